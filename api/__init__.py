@@ -1,6 +1,8 @@
 from flask import Blueprint
 from .user_api import user_blueprint
+from .invoice_api import invoice_blueprint
+from .vendor_api import vendor_blueprint
 
-api_blueprints = [user_blueprint]
+api_blueprints = [user_blueprint, invoice_blueprint, vendor_blueprint]
 
 __all__ = ['user_blueprints']
\ No newline at end of file
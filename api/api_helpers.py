@@ -0,0 +1,43 @@
+from functools import wraps
+from flask import request, jsonify, url_for
+from flask_login import current_user
+
+def page_limit(default, maximum):
+    """
+    The ?limit= argument clamped to maximum. Raises ValueError when it is not a positive number.
+    """
+    limit = request.args.get('limit', default, type=int)
+    if limit < 1:
+        raise ValueError("limit must be a positive number")
+    return min(limit, maximum)
+
+def conditional_response(payload):
+    # ETag is a hash of the body, so it stays valid across workers and restarts.
+    # No Last-Modified: nothing in a worker knows when data last changed everywhere.
+    response = jsonify(payload)
+    response.add_etag()
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def page_response(items, next_cursor):
+    """
+    conditional_response for a list page, with Link and X-Next-Cursor headers
+    pointing at the next page when there is one.
+    """
+    response = conditional_response(items)
+    if next_cursor:
+        args = request.args.to_dict(flat=False)
+        args['cursor'] = next_cursor
+        next_url = url_for(request.endpoint, **request.view_args, **args, _external=True)
+        response.headers['Link'] = f'<{next_url}>; rel="next"'
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+def api_login_required(view):
+    # Like login_required, but answers 401 JSON instead of redirecting to the login page
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not current_user.is_authenticated:
+            return jsonify({"message": "Login required"}), 401
+        return view(*args, **kwargs)
+    return wrapper
\ No newline at end of file
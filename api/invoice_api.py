@@ -0,0 +1,181 @@
+from datetime import date
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from flask import Blueprint, request, jsonify
+from flask_login import current_user
+from sqlalchemy.exc import SQLAlchemyError
+from models import db, Vendors
+from database import get_invoice_api_page, get_invoice_api_item, invoice_api_filters
+from database import write_invoice_batch, INVOICE_WRITE_MODES
+from database.database_helpers import API_PAGE_SIZE, MAX_API_PAGE_SIZE
+from .api_helpers import page_limit, conditional_response, page_response, api_login_required
+
+MAX_BATCH_INVOICES = 5000
+MAX_AMOUNT = Decimal('99999999.99')  # Numeric(10, 2)
+
+invoice_blueprint = Blueprint('invoice_api', __name__, url_prefix='/api/v1/invoices')
+
+def date_arg(name):
+    value = request.args.get(name)
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        raise ValueError(f"{name} must be a date like 2024-01-31")
+
+def amount_arg(name):
+    value = request.args.get(name)
+    try:
+        return Decimal(value) if value else None
+    except InvalidOperation:
+        raise ValueError(f"{name} must be a number")
+
+@invoice_blueprint.route('/<int:id>/', methods=['GET'])
+@api_login_required
+def get_invoice(id):
+    invoice = get_invoice_api_item(id)
+    if invoice:
+        return conditional_response(invoice)
+    return jsonify({"message": "Invoice not found"}), 404
+
+@invoice_blueprint.route('/', methods=['GET'])
+@api_login_required
+def all_invoices():
+    try:
+        filters = invoice_api_filters(
+            vendor_ids=request.args.getlist('vendor_id', type=int),
+            user_id=request.args.get('user_id', type=int),
+            date_from=date_arg('date_from'),
+            date_to=date_arg('date_to'),
+            min_amount=amount_arg('min_amount'),
+            max_amount=amount_arg('max_amount'),
+        )
+        limit = page_limit(API_PAGE_SIZE, MAX_API_PAGE_SIZE)
+        invoices, next_cursor = get_invoice_api_page(filters, request.args.get('cursor'), limit)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    return page_response(invoices, next_cursor)
+
+# --- Batch writes ---
+def money(value, name, required):
+    if value is None or value == '':
+        if required:
+            raise ValueError(f"{name} is required")
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f"{name} must be a number")
+    try:
+        amount = Decimal(str(value)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    except InvalidOperation:
+        raise ValueError(f"{name} must be a number")
+    if amount < 0 or amount > MAX_AMOUNT:
+        raise ValueError(f"{name} must be between 0 and {MAX_AMOUNT}")
+    return amount
+
+def invoice_batch_row(item, user_id):
+    """
+    Validate one JSON invoice with the same rules as InvoiceForm.
+    Returns the row to insert; raises ValueError with the reason otherwise.
+    """
+    if not isinstance(item, dict):
+        raise ValueError("Each invoice must be an object")
+
+    number = item.get('invoice_number')
+    if not isinstance(number, str) or not number.strip():
+        raise ValueError("invoice_number is required")
+    if len(number.strip()) > 64:
+        raise ValueError("invoice_number is longer than 64 characters")
+
+    try:
+        invoice_date = date.fromisoformat(item.get('date') or '')
+    except (TypeError, ValueError):
+        raise ValueError("date must be a date like 2024-01-31")
+
+    vendor_id = item.get('vendor_id')
+    if not isinstance(vendor_id, int) or isinstance(vendor_id, bool) or vendor_id < 1:
+        raise ValueError("vendor_id is required")
+
+    description = item.get('description') or None
+    if description is not None and (not isinstance(description, str) or len(description) > 256):
+        raise ValueError("description must be text of at most 256 characters")
+
+    return {
+        'invoice_number': number.strip(),
+        'date': invoice_date,
+        'vendor_id': vendor_id,
+        'user_id': user_id,
+        'amount': money(item.get('amount'), 'amount', required=True),
+        'tax': money(item.get('tax'), 'tax', required=False),
+        'description': description,
+    }
+
+def validate_invoice_batch(items, user_id):
+    """
+    Returns (results, rows): one result per item in request order, and the
+    valid rows. Vendors are checked with one query for the whole batch.
+    """
+    results = []
+    rows = []
+    for index, item in enumerate(items):
+        result = {'index': index, 'invoice_number': item.get('invoice_number') if isinstance(item, dict) else None}
+        results.append(result)
+        try:
+            row = invoice_batch_row(item, user_id)
+        except ValueError as e:
+            result.update(status='invalid', reason=str(e))
+            continue
+        result['invoice_number'] = row['invoice_number']
+        rows.append((result, row))
+
+    vendor_ids = {row['vendor_id'] for _, row in rows}
+    known = set()
+    if vendor_ids:
+        known = {vendor_id for (vendor_id,) in db.session.query(Vendors.id).filter(Vendors.id.in_(vendor_ids))}
+
+    valid = []
+    seen = set()
+    for result, row in rows:
+        if row['vendor_id'] not in known:
+            result.update(status='invalid', reason=f"Unknown vendor_id {row['vendor_id']}")
+        elif row['invoice_number'] in seen:
+            result.update(status='invalid', reason="Duplicate invoice_number in this batch")
+        else:
+            seen.add(row['invoice_number'])
+            valid.append(row)
+    return results, valid
+
+@invoice_blueprint.route('/batch', methods=['POST'])
+@api_login_required
+def batch_invoices():
+    """
+    Body: {"mode": "skip" | "upsert", "invoices": [...]} or just the list.
+    Existing invoice numbers are skipped, or updated in upsert mode; all
+    writes happen in one transaction.
+    """
+    payload = request.get_json(silent=True)
+    if isinstance(payload, list):
+        payload = {'invoices': payload}
+    if not isinstance(payload, dict) or not isinstance(payload.get('invoices'), list):
+        return jsonify({"message": "Send a JSON body with an 'invoices' list"}), 400
+
+    mode = payload.get('mode', 'skip')
+    if mode not in INVOICE_WRITE_MODES:
+        return jsonify({"message": f"mode must be one of: {', '.join(INVOICE_WRITE_MODES)}"}), 400
+    items = payload['invoices']
+    if len(items) > MAX_BATCH_INVOICES:
+        return jsonify({"message": f"Too many invoices, the limit is {MAX_BATCH_INVOICES} per batch"}), 413
+
+    results, rows = validate_invoice_batch(items, current_user.id)
+    try:
+        outcomes = write_invoice_batch(rows, mode) if rows else {}
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        return jsonify({"message": "The batch could not be saved, nothing was written"}), 500
+
+    summary = {'created': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0, 'invalid': 0}
+    for result in results:
+        if 'status' not in result:
+            result['status'] = outcomes[result['invoice_number']]
+            if result['status'] == 'skipped':
+                result['reason'] = "Invoice number already exists"
+        summary[result['status']] += 1
+    return jsonify({"mode": mode, "summary": summary, "results": results}), 200
\ No newline at end of file
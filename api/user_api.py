@@ -1,17 +1,42 @@
 from flask import Blueprint, request, jsonify
-from database import get_user_by_id, get_all_users
+from database import get_users_page, get_user_fields, USER_API_FIELDS
+from database.database_helpers import USERS_PER_PAGE, MAX_USERS_PER_PAGE
+from .api_helpers import page_limit, conditional_response, page_response
 
 user_blueprint = Blueprint('user_api', __name__,  url_prefix='/api/v1/users')
 
+def requested_fields():
+    """
+    Columns named in ?fields=a,b (all public columns when missing).
+    Raises ValueError for unknown names.
+    """
+    value = request.args.get('fields', '').strip()
+    if not value:
+        return USER_API_FIELDS
+    fields = tuple(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in USER_API_FIELDS]
+    if unknown or not fields:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(USER_API_FIELDS)}")
+    return fields
+
 @user_blueprint.route('/<int:id>/', methods=['GET'])
 def get_users(id):
-    user = get_user_by_id(id)
+    try:
+        fields = requested_fields()
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
 
+    user = get_user_fields(id, fields)
     if user:
-        return jsonify([user.to_dict()]), 200
+        return conditional_response([user])
     return jsonify({"message": "User not found"}), 404
 
 @user_blueprint.route('/', methods=['GET'])
 def all_users():
-    users = get_all_users()
-    return jsonify([user.to_dict() for user in users]), 200
\ No newline at end of file
+    try:
+        fields = requested_fields()
+        limit = page_limit(USERS_PER_PAGE, MAX_USERS_PER_PAGE)
+        users, next_cursor = get_users_page(fields, request.args.get('cursor'), limit)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    return page_response(users, next_cursor)
\ No newline at end of file
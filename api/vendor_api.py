@@ -0,0 +1,30 @@
+from flask import Blueprint, request, jsonify
+from database import get_vendor_api_page, get_vendor_api_item, vendor_api_filters
+from database.database_helpers import API_PAGE_SIZE, MAX_API_PAGE_SIZE
+from .api_helpers import page_limit, conditional_response, page_response, api_login_required
+
+vendor_blueprint = Blueprint('vendor_api', __name__, url_prefix='/api/v1/vendors')
+
+@vendor_blueprint.route('/<int:id>/', methods=['GET'])
+@api_login_required
+def get_vendor(id):
+    vendor = get_vendor_api_item(id)
+    if vendor:
+        return conditional_response(vendor)
+    return jsonify({"message": "Vendor not found"}), 404
+
+@vendor_blueprint.route('/', methods=['GET'])
+@api_login_required
+def all_vendors():
+    try:
+        filters = vendor_api_filters(
+            name=request.args.get('name'),
+            country=request.args.get('country'),
+            city=request.args.get('city'),
+            business_type=request.args.get('business_type'),
+        )
+        limit = page_limit(API_PAGE_SIZE, MAX_API_PAGE_SIZE)
+        vendors, next_cursor = get_vendor_api_page(filters, request.args.get('cursor'), limit)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    return page_response(vendors, next_cursor)
\ No newline at end of file
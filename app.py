@@ -1,32 +1,52 @@
-from flask import Flask, request, session, redirect, render_template, url_for, flash, jsonify
-from models import db, Users, Vendors, Invoices, table_to_json
-from flask_migrate import Migrate
+import time
+APP_IMPORT_STARTED = time.perf_counter()
+
+from flask import Flask, request, session, redirect, render_template, url_for, flash, jsonify, Response, stream_with_context
+from models import db, Users, Vendors, Invoices, table_to_json, iter_table_json
 from forms import *
 from api import api_blueprints
+from database import get_invoice_page, get_invoice_totals, get_vendor_spend, ANALYTIC_BUCKETS
+from database import get_user_directory_page
+from database import apply_invoice_to_rollup, rebuild_vendor_rollup
+from cache import snapshot_cache, parse_cache, bump_data_version
+from cache import user_cache, user_record, user_from_record
+from chat import CHAT_MODEL, FakeModelClient, build_prompt, response_text, sse_event
+from chat import new_conversation_key, add_message, recent_messages, history_for_prompt, prune_idle_conversations
 from dotenv import load_dotenv
 from flask_login import LoginManager, UserMixin, current_user , login_user, login_required, logout_user
 from flask_cors import CORS
 from datetime import datetime, timezone
-from utilities import parse_invoice_pdf
-from google import genai
+from utilities import parse_invoice_pdf, match_vendor
+from jobs import pdf_queue, QueueFull, QueueUnavailable
+from ingest import read_pdf_files, ingest_invoice_pdfs, summarize_report, import_invoice_csv
+from ledger import LEDGER_FORMATS
+from instrumentation import init_instrumentation, track_startup
+from search import ensure_search_index, search_vendors, search_invoices, vendor_match_ids
+from search import SEARCH_LIMIT, MAX_SEARCH_LIMIT
+from demo_template import template_path, can_restore, restore_template
+from vendor_index import vendor_index, TYPEAHEAD_LIMIT, MAX_TYPEAHEAD_LIMIT
 from sqlalchemy import func
+import click
+import contextlib
+import io
 import json
 import sqlite3
+import zipfile
 import re
 import os
-
-migrate = Migrate()
+import sys
 
 login_manager = LoginManager()
 login_manager.login_view = 'login'
 
-def create_app():
+def create_app(database_url=None):
     load_dotenv()
 
     app = Flask(__name__)
 
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'fallback-secret-key')
-    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///app.db')
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url or os.environ.get('DATABASE_URL', 'sqlite:///app.db')
+    app.config['DEMO_TEMPLATE_PATH'] = os.environ.get('DEMO_TEMPLATE_PATH')
 
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
@@ -35,25 +55,193 @@ def create_app():
     app.config['SESSION_COOKIE_SECURE'] = True
 
     db.init_app(app)
-    migrate.init_app(app, db)
+    # Only the `flask db` commands need Flask-Migrate, and alembic is slow to import
+    if os.environ.get('FLASK_RUN_FROM_CLI'):
+        from flask_migrate import Migrate
+        Migrate(app, db)
     login_manager.init_app(app)
 
     CORS(app)
 
-    with app.app_context():
-        db.create_all()
+    # Opt-in per-request SQL counting and N+1 detection
+    app.config['SQL_INSTRUMENTATION'] = os.environ.get('SQL_INSTRUMENTATION', '').lower() in ('1', 'true', 'yes')
+    app.config['SQL_N_PLUS_ONE_THRESHOLD'] = int(os.environ.get('SQL_N_PLUS_ONE_THRESHOLD', 5))
+    init_instrumentation(app)
+
+    # Offline stand-in for Gemini, e.g. for local development and tests
+    if os.environ.get('CHATBOT_FAKE_MODEL'):
+        app.config['CHATBOT_CLIENT'] = FakeModelClient()
+
+    # Schema and demo data come from `flask init-db`; only hosts without a
+    # release step should set AUTO_INIT_DB
+    if os.environ.get('AUTO_INIT_DB', '').lower() in ('1', 'true', 'yes'):
+        with app.app_context():
+            init_database(seed=True)
+    return app
+
+def init_database(seed=True):
+    db.create_all()
+    ensure_search_index()
+    if seed:
         from data_seed import seed_all
         seed_all()
-    return app
+
+def build_demo_template(path):
+    """
+    Seed a brand new SQLite file with a throwaway app and move it into place,
+    leaving the live database untouched.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    template_app = create_app(database_url=f"sqlite:///{os.path.abspath(tmp_path)}")
+    with template_app.app_context():
+        init_database(seed=True)
+        db.session.remove()
+        db.engine.dispose()
+    os.replace(tmp_path, path)
 
 app = create_app()
 
 for blueprint in api_blueprints:
     app.register_blueprint(blueprint)
 
+# Registered before any entry point can start serving, including `python app.py`
+track_startup(app, APP_IMPORT_STARTED)
+
+@app.cli.command("init-db")
+@click.option("--seed/--no-seed", default=True, help="Also load the demo users, vendors and invoices.")
+def init_db_command(seed):
+    """Create missing tables and the search index, and seed the demo data."""
+    init_database(seed=seed)
+    print("Database ready!")
+
+@app.cli.command("seed-db")
+def seed_db_command():
+    """Load the demo users, vendors and invoices if they are missing."""
+    from data_seed import seed_all
+    seed_all()
+
+@app.cli.command("build-demo-template")
+def build_demo_template_command():
+    """Capture freshly seeded demo data as the image /reset restores."""
+    path = template_path(app)
+    build_demo_template(path)
+    print(f"Demo template written to {path}")
+
+@app.cli.command("generate-data")
+@click.option("--users", type=int, default=0, help="Users to add.")
+@click.option("--vendors", type=int, default=0, help="Vendors to add.")
+@click.option("--invoices", type=int, default=0, help="Invoices to add.")
+@click.option("--years", type=int, default=3, help="Invoice dates cover this many years up to today.")
+@click.option("--seed", type=int, default=42, help="Random seed; the same seed gives the same data.")
+@click.option("--batch-size", type=int, default=10000, help="Rows per insert statement.")
+def generate_data_command(users, vendors, invoices, years, seed, batch_size):
+    """Bulk-load synthetic users, vendors and invoices for load testing."""
+    from synthetic_data import SyntheticDataGenerator
+
+    generator = SyntheticDataGenerator(seed=seed, batch_size=batch_size)
+    try:
+        generator.generate(users=users, vendors=vendors, invoices=invoices, years=years)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    # Derived data the bulk inserts did not maintain
+    started = time.perf_counter()
+    rebuild_vendor_rollup()
+    ensure_search_index()
+    bump_data_version()
+    vendor_index.invalidate()
+    print(f"Rollup and search index rebuilt in {time.perf_counter() - started:.2f}s")
+
+@app.cli.command("ingest-invoices")
+@click.argument("source")
+@click.option("--username", default="guest", help="User the invoices are recorded under.")
+@click.option("--workers", type=int, default=None, help="Parser processes (default: CPU count).")
+@click.option("--report", "report_path", default=None, help="Write the per-file report as JSON here.")
+def ingest_invoices_command(source, username, workers, report_path):
+    """Create invoices from a directory or zip file of PDFs."""
+    user = Users.query.filter_by(username=username).first()
+    if not user:
+        raise click.ClickException(f"User '{username}' does not exist.")
+
+    report = ingest_invoice_pdfs(read_pdf_files(source), user.id, workers=workers)
+
+    for entry in report:
+        print(f"{entry['status']:8} {entry['file']} {entry.get('reason', '')}")
+    print(summarize_report(report))
+
+    if report_path:
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+@app.cli.command("export-invoices")
+@click.option("--format", "fmt", type=click.Choice(sorted(LEDGER_FORMATS)), default="csv")
+@click.option("--output", default="-", help="File to write (default: stdout).")
+def export_invoices_command(fmt, output):
+    """Write the invoice ledger joined to vendors and users as CSV or JSON Lines."""
+    iter_ledger, _ = LEDGER_FORMATS[fmt]
+    # The CSV writer chooses its own line endings, so files are opened with newline=""
+    if output == "-":
+        stream = contextlib.nullcontext(sys.stdout)
+    else:
+        stream = open(output, "w", encoding="utf-8", newline="")
+    with stream as f:
+        for chunk in iter_ledger():
+            f.write(chunk)
+
+@app.cli.command("import-invoices")
+@click.argument("csv_path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--username", default="guest", help="User the invoices are recorded under.")
+def import_invoices_command(csv_path, username):
+    """Create invoices from a CSV file, skipping invoice numbers that already exist."""
+    user = Users.query.filter_by(username=username).first()
+    if not user:
+        raise click.ClickException(f"User '{username}' does not exist.")
+
+    with open(csv_path, encoding="utf-8-sig", newline="") as f:
+        try:
+            summary, problems = import_invoice_csv(f, user.id)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+    for entry in problems:
+        print(f"{entry['status']:8} line {entry['line']} {entry['invoice_number'] or ''} {entry['reason']}")
+    print(summary)
+
+@app.cli.command("prune-chats")
+@click.option("--days", type=int, default=30, help="Delete conversations idle for longer than this.")
+def prune_chats_command(days):
+    """Delete chatbot conversations with no message in the last N days."""
+    count = prune_idle_conversations(days)
+    print(f"Deleted {count} idle conversations")
+
+@app.cli.command("rebuild-search-index")
+def rebuild_search_index_command():
+    """Create the full-text search tables if needed and re-index vendors and invoices."""
+    if ensure_search_index():
+        print("Search index rebuilt!")
+    else:
+        print("Full-text search is not available on this database; search uses LIKE.")
+
+@app.cli.command("rebuild-rollup")
+def rebuild_rollup_command():
+    """Rebuild the vendor monthly spend rollup from the invoices table."""
+    rebuild_vendor_rollup()
+    print("Vendor spend rollup rebuilt!")
+
 @login_manager.user_loader
 def user_load(user_id):
-    return Users.query.get(int(user_id))
+    user_id = int(user_id)
+    record = user_cache.get(user_id)
+    if record is not None:
+        return user_from_record(record)
+
+    user = db.session.get(Users, user_id)
+    if user:
+        user_cache.put(user_id, user_record(user))
+    return user
 
 @app.route('/')
 def index():
@@ -66,7 +254,6 @@ def login():
         return redirect(url_for('dashboard'))
     
     form = LogInForm()
-    users = Users.query.all()
         
     if form.validate_on_submit():
         existing_user = Users.query.filter_by(username=form.username.data).first()
@@ -82,8 +269,7 @@ def login():
             flash('Incorrect username or password')
 
     return render_template('login.html',
-                           form=form,
-                           users=users)
+                           form=form)
 
 @app.route('/guest_login')
 def guest_login():
@@ -121,8 +307,7 @@ def dashboard():
             flash('Incorrect password.')
     return render_template('dashboard.html',
                            form=form if not session.get('is_guest') else form,
-                           guest=session.get('is_guest', False),
-                           users=Users.query.all()
+                           guest=session.get('is_guest', False)
     )
 
 ########## Users ##########
@@ -186,6 +371,7 @@ def user_edit():
         try:
             db.session.add(current_user)
             db.session.commit()
+            user_cache.invalidate(current_user.id)
             flash('User edited successfully.')
         except Exception as e:
             db.session.rollback()
@@ -205,8 +391,10 @@ def user_delete():
         return redirect(url_for('dashboard'))
 
     try:
+        user_id = current_user.id
         db.session.delete(current_user)
         db.session.commit()
+        user_cache.invalidate(user_id)
         logout_user()
         flash('User has been deleted successfully.')
 
@@ -237,6 +425,7 @@ def change_password():
                 try:
                     db.session.add(current_user)
                     db.session.commit()
+                    user_cache.invalidate(current_user.id)
                     flash('Password changed successfully.')
 
                 except Exception as e:
@@ -250,6 +439,12 @@ def change_password():
     return render_template('change_password.html',
                         form=form)
 
+@app.route('/user/cache/stats', methods=['GET'])
+@login_required
+
+def user_cache_stats():
+    return jsonify({'user_cache': user_cache.stats()})
+
 @app.route('/reset_password',methods=['GET','POST'])
 def reset_password():
     form = ResetPassword()
@@ -260,6 +455,7 @@ def reset_password():
             user.hash_password(form.password.data)
             try:
                 db.session.commit()
+                user_cache.invalidate(user.id)
                 flash('Password reset successful!')
                 return redirect(url_for('login'))
             except Exception as e:
@@ -272,9 +468,21 @@ def reset_password():
 
 @app.route('/users', methods=['GET'])
 def users():
-    users = Users.query.all()
+    search_query = request.args.get("q", "").strip()
+    cursor = request.args.get("after")
+
+    try:
+        users, next_cursor = get_user_directory_page(search_query, cursor)
+    except ValueError:
+        # Bad or stale cursor, start again from the first page
+        cursor = None
+        users, next_cursor = get_user_directory_page(search_query)
+
     return render_template('user_list.html',
-                           users=users)
+                           users=users,
+                           search_query=search_query,
+                           cursor=cursor,
+                           next_cursor=next_cursor)
 
 ########## Invoices ##########
 
@@ -282,8 +490,28 @@ def users():
 @login_required
 
 def invoice_list():
-    invoices_list = Invoices.query.join(Vendors).order_by(Invoices.date.desc()).all()
-    return render_template("invoice.html", invoices=invoices_list)
+    search_query = request.args.get("q", "").strip()
+    sort = request.args.get("sort", "date")
+    direction = request.args.get("dir", "desc")
+    cursor = request.args.get("after")
+
+    try:
+        invoices_list, next_cursor = get_invoice_page(search_query, sort, direction, cursor)
+    except ValueError:
+        # Bad or stale cursor, start again from the first page
+        cursor = None
+        invoices_list, next_cursor = get_invoice_page(search_query, sort, direction)
+
+    totals = get_invoice_totals(search_query)
+
+    return render_template("invoice.html",
+                           invoices=invoices_list,
+                           totals=totals,
+                           search_query=search_query,
+                           sort=sort,
+                           direction=direction,
+                           cursor=cursor,
+                           next_cursor=next_cursor)
 
 @app.route('/invoice/view/<int:invoice_id>')
 @login_required
@@ -293,12 +521,16 @@ def invoice_view(invoice_id):
     return render_template("invoice_view.html", invoice=invoice_obj)
 
 
+def selected_vendor_name(form):
+    # Shown in the vendor typeahead for the id the form holds; a primary key lookup
+    vendor = db.session.get(Vendors, form.vendor_id.data) if form.vendor_id.data else None
+    return vendor.vendor_name if vendor else ""
+
 @app.route('/invoice/add', methods=['GET', 'POST'])
 @login_required
 
 def invoice_add():
     form = InvoiceForm()
-    form.set_vendor_choices()
     pdf_snippet = None
 
     if form.validate_on_submit():
@@ -306,7 +538,8 @@ def invoice_add():
         existing_invoice = Invoices.query.filter_by(invoice_number=form.invoice_number.data).first()
         if existing_invoice:
             flash('An invoice with this number already exists!')
-            return render_template('invoice_add.html', form=form, pdf_snippet=pdf_snippet)
+            return render_template('invoice_add.html', form=form, pdf_snippet=pdf_snippet,
+                                   vendor_name=selected_vendor_name(form))
         
         invoice = Invoices(
             invoice_number=form.invoice_number.data,
@@ -318,6 +551,7 @@ def invoice_add():
             description=form.description.data
         )
         db.session.add(invoice)
+        apply_invoice_to_rollup(invoice.vendor_id, invoice.date, invoice.amount, invoice.tax)
         db.session.commit()
         flash("Invoice saved successfully!")
         return redirect(url_for('invoice_add'))
@@ -326,7 +560,8 @@ def invoice_add():
             for error in errors:
                 flash(f"{getattr(form, field).label.text}: {error}", "error")
 
-    return render_template('invoice_add.html', form=form, pdf_snippet=pdf_snippet)
+    return render_template('invoice_add.html', form=form, pdf_snippet=pdf_snippet,
+                           vendor_name=selected_vendor_name(form))
 
 # Route to handle AJAX PDF parsing
 @app.route('/invoice/parse_pdf', methods=['POST'])
@@ -340,9 +575,101 @@ def parse_pdf():
         return jsonify({'error': 'Invalid file type. Please upload a PDF.'}), 400
 
     pdf_bytes = pdf_file.read()
-    fields, _ = parse_invoice_pdf(pdf_bytes)
+    fields, cached = parse_invoice_pdf(pdf_bytes)
+
+    return jsonify({'fields': fields, 'cached': cached})
+
+# Bulk upload: a zip of invoice PDFs, parsed in parallel
+@app.route('/invoice/bulk', methods=['POST'])
+@login_required
+
+def invoice_bulk():
+    zip_file = request.files.get('zip_file')
+    if not zip_file:
+        return jsonify({'error': 'No file uploaded.'}), 400
 
-    return jsonify({'fields': fields})
+    try:
+        files = read_pdf_files(io.BytesIO(zip_file.read()))
+        report = ingest_invoice_pdfs(files, current_user.id, queue=pdf_queue)
+    except zipfile.BadZipFile:
+        return jsonify({'error': 'Invalid file type. Please upload a zip of PDFs.'}), 400
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except QueueUnavailable as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '5'}
+
+    return jsonify({'summary': summarize_report(report), 'report': report})
+
+# Full invoice ledger, streamed in chunks so memory stays flat
+@app.route('/invoice/export.<fmt>', methods=['GET'])
+@login_required
+
+def invoice_export(fmt):
+    if fmt not in LEDGER_FORMATS:
+        return render_template('404.html'), 404
+    iter_ledger, mimetype = LEDGER_FORMATS[fmt]
+    filename = f"invoices-{datetime.now(timezone.utc):%Y%m%d}.{fmt}"
+    return Response(stream_with_context(iter_ledger()),
+                    mimetype=mimetype,
+                    headers={"Content-Disposition": f"attachment; filename={filename}"})
+
+# CSV import, validated and inserted in chunks
+@app.route('/invoice/import', methods=['POST'])
+@login_required
+
+def invoice_import():
+    csv_file = request.files.get('csv_file')
+    if not csv_file:
+        return jsonify({'error': 'No file uploaded.'}), 400
+    if not csv_file.filename.lower().endswith('.csv'):
+        return jsonify({'error': 'Invalid file type. Please upload a CSV file.'}), 400
+
+    try:
+        stream = io.TextIOWrapper(csv_file.stream, encoding='utf-8-sig', newline='')
+        summary, problems = import_invoice_csv(stream, current_user.id)
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({'summary': summary, 'problems': problems})
+
+# Queue the PDF for a worker process and return a job id right away
+@app.route('/invoice/parse_pdf/jobs', methods=['POST'])
+@login_required
+
+def parse_pdf_job():
+    pdf_file = request.files.get('pdf_file')
+    if not pdf_file:
+        return jsonify({'error': 'No file uploaded.'}), 400
+    if not pdf_file.filename.lower().endswith('.pdf'):
+        return jsonify({'error': 'Invalid file type. Please upload a PDF.'}), 400
+
+    try:
+        job_id = pdf_queue.submit(pdf_file.read(), owner=current_user.id)
+    except (QueueFull, QueueUnavailable) as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '5'}
+
+    return jsonify({'job_id': job_id,
+                    'status_url': url_for('parse_pdf_job_status', job_id=job_id)}), 202
+
+@app.route('/invoice/parse_pdf/jobs/<job_id>', methods=['GET'])
+@login_required
+
+def parse_pdf_job_status(job_id):
+    job = pdf_queue.status(job_id, owner=current_user.id)
+    if job is None:
+        return jsonify({'error': 'Job not found.'}), 404
+
+    # Vendor matching needs the database, so it happens here rather than in the worker
+    if job['status'] == 'done':
+        job['fields'] = match_vendor(job['fields'])
+
+    return jsonify(job)
+
+@app.route('/invoice/parse_pdf/stats', methods=['GET'])
+@login_required
+
+def parse_pdf_stats():
+    return jsonify({'cache': parse_cache.stats(), 'queue': pdf_queue.stats()})
 
 @app.route('/invoice/edit/<int:invoice_id>', methods=['GET', 'POST'])
 @login_required
@@ -350,9 +677,11 @@ def parse_pdf():
 def invoice_edit(invoice_id):
     invoice = Invoices.query.get_or_404(invoice_id)
     form = EditInvoiceForm(obj=invoice)
-    form.set_vendor_choices()  # populate vendor dropdown
 
     if form.validate_on_submit():
+        # Take the old values out of the rollup before applying the new ones
+        apply_invoice_to_rollup(invoice.vendor_id, invoice.date, invoice.amount, invoice.tax, sign=-1)
+
         invoice.invoice_number = form.invoice_number.data
         invoice.date = form.date.data
         invoice.vendor_id = form.vendor_id.data
@@ -360,11 +689,13 @@ def invoice_edit(invoice_id):
         invoice.tax = form.tax.data
         invoice.description = form.description.data
 
+        apply_invoice_to_rollup(invoice.vendor_id, invoice.date, invoice.amount, invoice.tax)
         db.session.commit()
         flash("Invoice updated successfully!")
         # return redirect(url_for('invoice_list'))
 
-    return render_template('invoice_edit.html', form=form, invoice=invoice)
+    return render_template('invoice_edit.html', form=form, invoice=invoice,
+                           vendor_name=selected_vendor_name(form))
 
 ########## Vendors ##########
 
@@ -376,7 +707,10 @@ def vendor():
 
     if request.method == "POST":
         search_query = request.form.get("search", "").strip()
-        if search_query:
+        vendor_ids = vendor_match_ids(search_query)
+        if vendor_ids is not None:
+            vendors_list = Vendors.query.filter(Vendors.id.in_(vendor_ids)).order_by(Vendors.vendor_name).all()
+        elif search_query:
             vendors_list = Vendors.query.filter(Vendors.vendor_name.ilike(f"%{search_query}%")).all()
         else:
             vendors_list = Vendors.query.all()
@@ -385,6 +719,22 @@ def vendor():
 
     return render_template("vendor.html", vendors=vendors_list, search_query=search_query)
 
+@app.route('/vendor/typeahead')
+@login_required
+
+def vendor_typeahead():
+    # Vendors whose name, or a word in it, starts with q; served from the in-memory index
+    query = request.args.get("q", "").strip()
+    limit = max(1, min(request.args.get("limit", TYPEAHEAD_LIMIT, type=int), MAX_TYPEAHEAD_LIMIT))
+
+    started = time.perf_counter()
+    matches = vendor_index.prefix_search(query, limit)
+    return jsonify({
+        "q": query,
+        "vendors": [{"id": vendor_id, "vendor_name": vendor_name} for vendor_id, vendor_name in matches],
+        "took_ms": round((time.perf_counter() - started) * 1000, 3),
+    })
+
 @app.route('/vendor/view/<int:vendor_id>')
 @login_required
 
@@ -410,6 +760,7 @@ def vendor_add():
         )
         db.session.add(new_vendor)
         db.session.commit()
+        vendor_index.upsert(new_vendor.id, new_vendor.vendor_name)
         flash('Vendor added successfully!')
         return redirect(url_for('dashboard'))
 
@@ -434,6 +785,7 @@ def vendor_edit(vendor_id):
         vendor.city = form.city.data
         vendor.postal_code = form.postal_code.data
         db.session.commit()
+        vendor_index.upsert(vendor.id, vendor.vendor_name)
         flash('Vendor updated successfully!')
         #return redirect(url_for('vendor'))
 
@@ -444,39 +796,61 @@ def vendor_edit(vendor_id):
 @app.route("/analytic")
 def analytic():
     selected_vendor = request.args.getlist("vendor_id")  # multiple vendors
-    vendors = Vendors.query.all()
-    
+    bucket = request.args.get("bucket", "")
+    start_date = parse_date_arg(request.args.get("start"))
+    end_date = parse_date_arg(request.args.get("end"))
+
+    # Only the chosen vendors are loaded; the picker finds others through /vendor/typeahead
+    vendor_ids = [int(v) for v in selected_vendor if v.isdigit()]
+    vendors = []
+    if vendor_ids:
+        vendors = db.session.query(Vendors.id, Vendors.vendor_name) \
+            .filter(Vendors.id.in_(vendor_ids)).order_by(Vendors.vendor_name).all()
+
     # Convert to JSON-serializable list of dicts
     vendors_list = [{"id": v.id, "vendor_name": v.vendor_name} for v in vendors]
+    vendor_ids = [v.id for v in vendors]
 
-    bar_data = []
-
-    if selected_vendor:
-        vendor_objs = Vendors.query.filter(Vendors.id.in_(selected_vendor)).all()
-        for vendor_obj in vendor_objs:
-            bar_data.append({
-                "vendor": vendor_obj.vendor_name,
-                "amount": float(sum([inv.amount for inv in vendor_obj.invoices])),
-                "tax": float(sum([inv.tax or 0 for inv in vendor_obj.invoices]))
-            })
+    # Totals per vendor, plus one row per vendor per period when a bucket is chosen
+    bar_data = get_vendor_spend(vendor_ids, start_date, end_date)
+    series_data = []
+    if bucket in ANALYTIC_BUCKETS:
+        series_data = get_vendor_spend(vendor_ids, start_date, end_date, bucket)
 
     return render_template(
         "analytic.html",
         vendors=vendors_list,          # pass the list of dicts
-        selected_vendor=selected_vendor,
-        bar_data=bar_data
+        bar_data=bar_data,
+        series_data=series_data,
+        bucket=bucket,
+        start=start_date.isoformat() if start_date else "",
+        end=end_date.isoformat() if end_date else ""
     )
 
+def parse_date_arg(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+    except ValueError:
+        return None
+
 ########## Chat Bot ##########
 
-GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY")
-client = genai.Client(api_key=GOOGLE_API_KEY)
+_gemini_client = None
+
+def gemini_client():
+    # Built on first use: importing google.genai alone takes most of a second
+    global _gemini_client
+    if _gemini_client is None:
+        from google import genai
+        _gemini_client = genai.Client(api_key=os.environ.get("GOOGLE_API_KEY"))
+    return _gemini_client
 
 @app.route("/chatbot")
 @login_required
 
 def chatbot_page():
-    conversation = session.get("conversation", [])
+    key = session.get("chat_key")
+    conversation = recent_messages(key) if key else []
     return render_template("chatbot.html", conversation=conversation)
 
 base_prompt = """
@@ -569,6 +943,20 @@ CREATOR INFORMATION
 - Project Github page: https://github.com/Tareqhaboukh/project_one/
 """
 
+def model_client():
+    return app.config.get("CHATBOT_CLIENT") or gemini_client()
+
+def conversation_key():
+    if "chat_key" not in session:
+        session["chat_key"] = new_conversation_key()
+    return session["chat_key"]
+
+def chat_prompt(key):
+    summary, history = history_for_prompt(key, app.config.get("CHAT_HISTORY_TOKENS", 2000))
+    # Database snapshot is rebuilt only after the data has changed
+    json_str = snapshot_cache.get(limit_per_table=50)
+    return build_prompt(base_prompt, json_str, history, summary)
+
 @app.route("/ask", methods=["POST"])
 @login_required
 
@@ -579,47 +967,89 @@ def ask():
     if not question:
         return jsonify({"answer": "Please provide a question."})
 
-    # Initialize or retrieve conversation from session
-    if "conversation" not in session:
-        session["conversation"] = []
+    # Conversation history is stored server side under a per-session key
+    key = conversation_key()
+    add_message(key, "user", question)
 
-    # Add user's message to session history
-    session["conversation"].append({"role": "user", "content": question})
-
-    # Prepare database snapshot
-    db_json = table_to_json(limit_per_table=50)
-    json_str = json.dumps(db_json)
-
-    # Build prompt dynamically using conversation history
-    prompt = f"{base_prompt}\n\nHere is the database:\n{json_str}\n\n"
-    for msg in session["conversation"]:
-        role = "User" if msg["role"] == "user" else "Assistant"
-        prompt += f"{role}: {msg['content']}\n"
-    prompt += "Assistant:"
+    # Build prompt from a bounded window of history plus a running summary
+    prompt = chat_prompt(key)
 
     try:
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
+        response = model_client().models.generate_content(
+            model=CHAT_MODEL,
             contents=prompt
         )
-
-        # Handle Gemini response structure
-        if hasattr(response, "text"):
-            answer = response.text.strip()
-        elif hasattr(response, "candidates"):
-            answer = response.candidates[0].content.strip()
-        else:
-            answer = str(response)
+        answer = response_text(response).strip()
 
         # Add assistant's reply to conversation
-        session["conversation"].append({"role": "assistant", "content": answer})
-        session.modified = True  # ensure the session updates are saved
+        add_message(key, "assistant", answer)
 
     except Exception as e:
         answer = f"Error: {str(e)}"
 
     return jsonify({"answer": answer})
 
+@app.route("/ask/stream", methods=["POST"])
+@login_required
+
+def ask_stream():
+    data = request.get_json(silent=True) or {}
+    question = data.get("question", "").strip()
+
+    if not question:
+        return jsonify({"answer": "Please provide a question."}), 400
+
+    key = conversation_key()
+    add_message(key, "user", question)
+    prompt = chat_prompt(key)
+
+    def generate():
+        parts = []
+        try:
+            models = model_client().models
+            for chunk in models.generate_content_stream(model=CHAT_MODEL, contents=prompt):
+                text = response_text(chunk)
+                if text:
+                    parts.append(text)
+                    yield sse_event({"text": text})
+            yield sse_event({"answer": "".join(parts).strip()}, event="done")
+        except Exception as e:
+            yield sse_event({"error": f"Error: {str(e)}"}, event="error")
+        finally:
+            # Saved once the stream ends, even if the client went away
+            answer = "".join(parts).strip()
+            if answer:
+                add_message(key, "assistant", answer)
+
+    return Response(stream_with_context(generate()),
+                    mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route("/ask/stats")
+@login_required
+
+def ask_stats():
+    return jsonify({"snapshot_cache": snapshot_cache.stats()})
+
+########## Search ##########
+@app.route("/search")
+@login_required
+
+def search():
+    # Ranked vendor and invoice hits for a search box
+    query = request.args.get("q", "").strip()
+    kind = request.args.get("type", "all")
+    limit = max(1, min(request.args.get("limit", SEARCH_LIMIT, type=int), MAX_SEARCH_LIMIT))
+
+    started = time.perf_counter()
+    results = {"q": query}
+    if kind in ("all", "vendors"):
+        results["vendors"] = search_vendors(query, limit)
+    if kind in ("all", "invoices"):
+        results["invoices"] = search_invoices(query, limit)
+    results["took_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return jsonify(results)
+
 ########## Other ##########
 @app.route("/docs")
 @login_required
@@ -627,6 +1057,15 @@ def ask():
 def api_docs():
     return render_template("api_docs.html", title="API v1 Documentation")
 
+@app.route("/export/database.json")
+@login_required
+
+def export_database():
+    # Streamed so the full export runs in constant memory
+    return Response(stream_with_context(iter_table_json()),
+                    mimetype="application/json",
+                    headers={"Content-Disposition": "attachment; filename=database.json"})
+
 @app.route('/reset', methods=['POST', 'GET'])
 @login_required
 
@@ -634,12 +1073,27 @@ def reset():
     from data_seed import seed_all
 
     try:
-        # Drop all tables
-        db.drop_all()
-        db.create_all()
+        if can_restore():
+            # Copy the seeded image over the database; built on the first reset
+            path = template_path(app)
+            if not os.path.exists(path):
+                build_demo_template(path)
+            restore_template(path)
+        else:
+            # Drop all tables
+            db.drop_all()
+            db.create_all()
 
-        # Seed database
-        seed_all()
+            # Seed database
+            seed_all()
+            # drop_all took the triggers with the tables
+            ensure_search_index()
+
+        # Nothing cached from before the reset is valid any more
+        bump_data_version()
+        snapshot_cache.clear()
+        vendor_index.invalidate()
+        user_cache.clear()
 
         logout_user()
 
@@ -658,7 +1112,7 @@ def ping():
 
 def page_not_found(e):
     if request.path.startswith('/api/'):
-        return jsonify({"message": "User not found"}), 404
+        return jsonify({"message": "Not found"}), 404
     return render_template('404.html'), 404
 
 if __name__ == '__main__':
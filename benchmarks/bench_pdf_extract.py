@@ -0,0 +1,140 @@
+"""
+Benchmark the PDF text extractor against the previous implementation.
+
+Generates a corpus of invoice PDFs without form fields (needs reportlab, from
+benchmarks/requirements.txt), then times the old join-all-pages-and-search-six-times
+extractor and extract_invoice_fields on every file.
+
+    python benchmarks/bench_pdf_extract.py --count 200 --filler-pages 30
+"""
+import argparse
+import io
+import os
+import random
+import re
+import statistics
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyPDF2 import PdfReader
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+from utilities import extract_invoice_fields
+
+VENDORS = ["Global Supplies Inc.", "TechMart Solutions", "GreenLeaf Construction",
+           "BlueSky Logistics", "PureWater Systems"]
+
+DATE_FORMATS = ["%m/%d/%Y", "%Y-%m-%d", "%B %d, %Y", "%d.%m.%Y"]
+
+# --- Corpus ---
+def make_invoice_pdf(number, rng, filler_pages):
+    invoice_date = date.fromordinal(rng.randint(date(2015, 1, 1).toordinal(), date(2025, 12, 31).toordinal()))
+    date_format = rng.choice(DATE_FORMATS)
+    amount = round(rng.uniform(100, 50000), 2)
+    tax = round(amount * 0.13, 2)
+
+    expected = {
+        'invoice_number': f"INV-{number:05d}",
+        'date': invoice_date.strftime("%m/%d/%Y"),
+        'amount': amount,
+        'tax': tax,
+        'description': f"Services for order {number}",
+        'vendor_name': rng.choice(VENDORS),
+    }
+
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    lines = [
+        f"Invoice Number: {expected['invoice_number']}",
+        f"Date: {invoice_date.strftime(date_format)}",
+        f"Vendor: {expected['vendor_name']}",
+        f"Amount: ${amount:,.2f}",
+        f"Tax: ${tax:,.2f}",
+        f"Description: {expected['description']}",
+    ]
+    y = 780
+    for line in lines:
+        pdf.drawString(50, y, line)
+        y -= 20
+    pdf.showPage()
+
+    # Terms and conditions style pages after the invoice fields
+    for page in range(filler_pages):
+        y = 780
+        for row in range(40):
+            pdf.drawString(50, y, f"Clause {page}.{row}: the supplier shall deliver goods as agreed in writing.")
+            y -= 18
+        pdf.showPage()
+
+    pdf.save()
+    return buffer.getvalue(), expected
+
+# --- Previous implementation, kept here for comparison ---
+def legacy_extract(pdf_bytes):
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    text = "".join([page.extract_text() or "" for page in reader.pages])
+    fields = {
+        'invoice_number': re.search(r"Invoice\s*Number[:\s]*([A-Za-z0-9-]+)", text, re.IGNORECASE),
+        'date': re.search(r"Date[:\s\n]*([0-9]{1,2}[-/][0-9]{1,2}[-/][0-9]{2,4})", text, re.IGNORECASE),
+        'amount': re.search(r"Amount[:\s]*\$?\s*([0-9.,]+)", text, re.IGNORECASE),
+        'tax': re.search(r"Tax[:\s]*\$?\s*([0-9.,]+)", text, re.IGNORECASE),
+        'description': re.search(r"Description[:\s]*(.+)", text, re.IGNORECASE),
+        'vendor_name': re.search(r"Vendor[:\s]*(.+)", text, re.IGNORECASE),
+    }
+    return {key: match.group(1).strip() if match else None for key, match in fields.items()}
+
+# --- Benchmark ---
+def time_extractor(extractor, corpus):
+    timings = []
+    results = []
+    for pdf_bytes, _ in corpus:
+        started = time.perf_counter()
+        results.append(extractor(pdf_bytes))
+        timings.append(time.perf_counter() - started)
+    return timings, results
+
+def correct_fields(result, expected):
+    correct = 0
+    for key, value in expected.items():
+        found = result.get(key)
+        if isinstance(value, float):
+            try:
+                found = float(str(found).replace(",", "")) if found is not None else None
+            except ValueError:
+                found = None
+        if found == value:
+            correct += 1
+    return correct
+
+def summarize(name, timings, results, corpus):
+    total_fields = sum(len(expected) for _, expected in corpus)
+    correct = sum(correct_fields(result, expected) for result, (_, expected) in zip(results, corpus))
+    ms = sorted(t * 1000 for t in timings)
+    print(f"{name:8} total {sum(timings):7.2f}s  mean {statistics.mean(ms):7.2f}ms  "
+          f"p50 {ms[len(ms) // 2]:7.2f}ms  p95 {ms[int(len(ms) * 0.95) - 1]:7.2f}ms  "
+          f"fields correct {correct}/{total_fields}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100, help="Number of PDFs to generate.")
+    parser.add_argument("--filler-pages", type=int, default=10, help="Extra pages after the invoice fields.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    corpus = [make_invoice_pdf(number, rng, rng.randint(0, args.filler_pages)) for number in range(args.count)]
+    print(f"Generated {len(corpus)} PDFs in {time.perf_counter() - started:.2f}s")
+
+    legacy_timings, legacy_results = time_extractor(legacy_extract, corpus)
+    new_timings, new_results = time_extractor(extract_invoice_fields, corpus)
+
+    summarize("legacy", legacy_timings, legacy_results, corpus)
+    summarize("current", new_timings, new_results, corpus)
+    print(f"speedup  {sum(legacy_timings) / sum(new_timings):.1f}x")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
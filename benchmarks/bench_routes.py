@@ -0,0 +1,260 @@
+"""
+Benchmark the hot routes against small, medium and large generated datasets.
+
+Each dataset is a SQLite file built once with `flask init-db` and
+`flask generate-data`, then reused. Every dataset runs in its own process,
+which drives the Flask test client through the routes below. For each route
+it records latency percentiles, the SQL query count (from the instrumentation
+header) and the peak Python memory of a single request (tracemalloc).
+
+    python benchmarks/bench_routes.py --datasets small,medium --output results.json
+    python benchmarks/bench_routes.py --baseline results.json --threshold 0.5
+
+With --baseline, the run fails (exit status 1) when a route's p50 or p95
+latency grows by more than the threshold (and by at least --min-ms), or when
+its query count goes up.
+"""
+import argparse
+import importlib.util
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATA_DIR = os.path.join(ROOT, "benchmarks", ".data")
+
+DATASETS = {
+    "small": {"users": 20, "vendors": 200, "invoices": 10000},
+    "medium": {"users": 100, "vendors": 2000, "invoices": 100000},
+    "large": {"users": 500, "vendors": 10000, "invoices": 1000000},
+}
+
+PERCENTILES = (50, 90, 95, 99)
+
+# --- Datasets ---
+def dataset_path(data_dir, name, seed):
+    sizes = DATASETS[name]
+    return os.path.join(data_dir, f"{name}-{sizes['users']}-{sizes['vendors']}-{sizes['invoices']}-{seed}.db")
+
+def build_dataset(path, name, seed):
+    sizes = DATASETS[name]
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}")
+    flask = [sys.executable, "-m", "flask", "--app", "app"]
+    started = time.perf_counter()
+    subprocess.run(flask + ["init-db"], cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+    subprocess.run(flask + ["generate-data", "--users", str(sizes["users"]), "--vendors", str(sizes["vendors"]),
+                            "--invoices", str(sizes["invoices"]), "--seed", str(seed)],
+                   cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+    print(f"Built {name} dataset in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+# --- Worker: runs inside one process per dataset ---
+def make_pdfs(count):
+    from bench_pdf_extract import make_invoice_pdf
+    import random
+    rng = random.Random(7)
+    return [make_invoice_pdf(number, rng, 2)[0] for number in range(count)]
+
+def route_plan(app_module, iterations, only):
+    """
+    [(name, callable taking the test client and the iteration number)].
+    """
+    from models import Vendors
+    with app_module.app.app_context():
+        vendor_ids = [vendor_id for (vendor_id,) in app_module.db.session.query(Vendors.id).order_by(Vendors.id).limit(5)]
+    analytic_query = "&".join(f"vendor_id={vendor_id}" for vendor_id in vendor_ids)
+    plan = [
+        ("invoice_list", lambda c, i: c.get("/invoice")),
+        ("invoice_list_sorted", lambda c, i: c.get("/invoice?sort=amount&dir=desc")),
+        ("invoice_search", lambda c, i: c.get("/invoice?q=supplies")),
+        ("vendor_search", lambda c, i: c.post("/vendor", data={"search": "steel"})),
+        ("analytic_totals", lambda c, i: c.get(f"/analytic?{analytic_query}")),
+        ("analytic_monthly", lambda c, i: c.get(f"/analytic?{analytic_query}&bucket=month")),
+        ("users_api", lambda c, i: c.get("/api/v1/users/")),
+        ("ask", lambda c, i: c.post("/ask", json={"question": f"How many invoices are there? ({i})"})),
+    ]
+    if not only or "parse_pdf" in only:
+        # A different PDF every time, so the parse cache does not answer
+        pdfs = make_pdfs(iterations + 2)
+        plan.append(("parse_pdf", lambda c, i: c.post(
+            "/invoice/parse_pdf", data={"pdf_file": (io.BytesIO(pdfs[i % len(pdfs)]), "invoice.pdf")},
+            content_type="multipart/form-data")))
+    return plan
+
+def percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+def run_route(client, request, iterations, warmup):
+    for i in range(warmup):
+        request(client, i)
+
+    timings = []
+    queries = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        response = request(client, warmup + i)
+        timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        queries.append(int(response.headers.get("X-Query-Count", 0)))
+
+    # Memory is measured on a separate request; tracing slows everything down
+    tracemalloc.start()
+    request(client, warmup + iterations)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ms = sorted(timings)
+    result = {f"p{pct}_ms": round(percentile(ms, pct), 2) for pct in PERCENTILES}
+    result.update({
+        "mean_ms": round(statistics.mean(ms), 2),
+        "max_ms": round(ms[-1], 2),
+        "queries": int(statistics.median(queries)),
+        "peak_kb": round(peak / 1024, 1),
+        "iterations": iterations,
+    })
+    return result
+
+def worker(iterations, warmup, only):
+    os.environ.setdefault("CHATBOT_FAKE_MODEL", "1")
+    os.environ["SQL_INSTRUMENTATION"] = "1"
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+    import logging
+    import app as app_module
+    logging.getLogger("sql_instrumentation").setLevel(logging.ERROR)
+    app_module.app.config["SESSION_COOKIE_SECURE"] = False
+
+    client = app_module.app.test_client()
+    client.get("/guest_login")
+
+    results = {}
+    for name, request in route_plan(app_module, iterations + warmup, only):
+        if only and name not in only:
+            continue
+        try:
+            results[name] = run_route(client, request, iterations, warmup)
+        except Exception as e:
+            results[name] = {"error": str(e)}
+        print(f"  {name:20} {results[name]}", file=sys.stderr)
+    print(json.dumps(results))
+
+# --- Comparison ---
+def compare(results, baseline, threshold, min_ms):
+    """
+    List of regression messages between two result documents.
+    """
+    problems = []
+    for dataset, current in results["datasets"].items():
+        previous = baseline.get("datasets", {}).get(dataset)
+        if not previous:
+            continue
+        for route, stats in current["routes"].items():
+            before = previous["routes"].get(route)
+            if not before or "error" in stats or "error" in before:
+                continue
+            for key in ("p50_ms", "p95_ms"):
+                limit = before[key] * (1 + threshold)
+                if stats[key] > limit and stats[key] - before[key] >= min_ms:
+                    problems.append(f"{dataset}/{route}: {key} {before[key]} -> {stats[key]}")
+            if stats["queries"] > before["queries"]:
+                problems.append(f"{dataset}/{route}: queries {before['queries']} -> {stats['queries']}")
+    return problems
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--datasets", default="small,medium", help="Comma separated: small, medium, large.")
+    parser.add_argument("--routes", default="", help="Comma separated route names (default: all).")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--rebuild", action="store_true", help="Regenerate the dataset files.")
+    parser.add_argument("--output", help="Write the results as JSON here.")
+    parser.add_argument("--baseline", help="Earlier results to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.5, help="Allowed relative slowdown (0.5 = 50%%).")
+    parser.add_argument("--min-ms", type=float, default=5.0, help="Ignore slowdowns smaller than this.")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    only = {name for name in args.routes.split(",") if name}
+    if args.worker:
+        worker(args.iterations, args.warmup, only)
+        return
+    if (not only or "parse_pdf" in only) and importlib.util.find_spec("reportlab") is None:
+        parser.error("parse_pdf needs reportlab: pip install -r benchmarks/requirements.txt, "
+                     "or leave parse_pdf out of --routes")
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "seed": args.seed,
+        },
+        "datasets": {},
+    }
+
+    for name in [name for name in args.datasets.split(",") if name]:
+        if name not in DATASETS:
+            parser.error(f"Unknown dataset '{name}'")
+        path = dataset_path(args.data_dir, name, args.seed)
+        if args.rebuild and os.path.exists(path):
+            os.remove(path)
+        if not os.path.exists(path):
+            build_dataset(path, name, args.seed)
+
+        print(f"{name}:", file=sys.stderr)
+        # Work on a copy so routes that write (/ask) do not change the dataset
+        work_path = f"{path}.run"
+        with open(path, "rb") as src, open(work_path, "wb") as dst:
+            dst.write(src.read())
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{work_path}")
+        try:
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker",
+                                     "--iterations", str(args.iterations), "--warmup", str(args.warmup),
+                                     "--routes", args.routes],
+                                    cwd=ROOT, env=env, capture_output=True, text=True)
+        finally:
+            os.remove(work_path)
+        sys.stderr.write(output.stderr if output.returncode else "")
+        if output.returncode:
+            sys.exit(f"Benchmark worker for {name} failed")
+        sys.stderr.write("\n".join(line for line in output.stderr.splitlines() if line.startswith("  ")) + "\n")
+
+        results["datasets"][name] = {"sizes": DATASETS[name],
+                                     "routes": json.loads(output.stdout.strip().splitlines()[-1])}
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        problems = compare(results, baseline, args.threshold, args.min_ms)
+        if problems:
+            print("Regressions:\n  " + "\n  ".join(problems))
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""
+Measure application startup: interpreter start to `import app` done, and to
+the first request served (GET /ping through the test client).
+
+Each run is a fresh process, like a new gunicorn worker.
+
+    python benchmarks/bench_startup.py --runs 10 --output startup.json --max-first-request-ms 1500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, time
+import app
+timings = dict(app.app.config["STARTUP_TIMINGS"])
+app.app.test_client().get("/ping")
+timings.update(app.app.config["STARTUP_TIMINGS"])
+heavy = ["google.genai", "PyPDF2", "reportlab"]
+import sys
+timings["loaded_heavy_modules"] = [name for name in heavy if name in sys.modules]
+print(json.dumps(timings))
+"""
+
+def run_once():
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", CHILD], cwd=ROOT, capture_output=True,
+                            text=True, check=True).stdout
+    total_ms = (time.perf_counter() - started) * 1000
+    timings = json.loads(output.strip().splitlines()[-1])
+    timings["process_ms"] = round(total_ms, 1)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="Write the results as JSON here.")
+    parser.add_argument("--max-first-request-ms", type=float,
+                        help="Exit with status 1 when the median import-to-first-request time is above this.")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    summary = {
+        key: round(statistics.median(run[key] for run in runs), 1)
+        for key in ("import_ms", "first_request_ms", "process_ms")
+    }
+    summary["loaded_heavy_modules"] = runs[-1]["loaded_heavy_modules"]
+
+    for key, value in summary.items():
+        print(f"{key:22} {value}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"summary": summary, "runs": runs}, f, indent=2)
+
+    if args.max_first_request_ms and summary["first_request_ms"] > args.max_first_request_ms:
+        print(f"Startup regression: {summary['first_request_ms']}ms > {args.max_first_request_ms}ms")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
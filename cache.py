@@ -0,0 +1,281 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+from models import db, Users, Vendors, Invoices, table_to_json
+
+# --- Data version ---
+# Goes up every time a transaction that wrote Users, Vendors or Invoices commits.
+# It is per process, so caches keyed on it also use a max age to pick up
+# writes made by other workers.
+TRACKED_MODELS = (Users, Vendors, Invoices)
+
+_version_lock = threading.Lock()
+_data_version = 0
+
+def data_version():
+    return _data_version
+
+def bump_data_version():
+    global _data_version
+    with _version_lock:
+        _data_version += 1
+    return _data_version
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, TRACKED_MODELS):
+            session.info["data_changed"] = True
+            return
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_statements(orm_execute_state):
+    # Bulk insert/update/delete statements never go through a flush
+    if orm_execute_state.is_select:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and issubclass(mapper.class_, TRACKED_MODELS):
+        orm_execute_state.session.info["data_changed"] = True
+
+@event.listens_for(Session, "after_commit")
+def _bump_on_commit(session):
+    if session.info.pop("data_changed", False):
+        bump_data_version()
+
+@event.listens_for(Session, "after_rollback")
+def _forget_on_rollback(session):
+    session.info.pop("data_changed", None)
+
+# --- Chatbot database snapshot ---
+class SnapshotCache:
+    """
+    Keeps the serialized table_to_json() string for the current data version.
+    """
+    def __init__(self, max_age=60):
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._key = None
+        self._value = None
+        self._built_at = 0
+
+    def get(self, limit_per_table=50):
+        key = (data_version(), limit_per_table)
+
+        with self._lock:
+            if self._key == key and time.monotonic() - self._built_at < self.max_age:
+                self.hits += 1
+                return self._value
+            self.misses += 1
+
+        value = json.dumps(table_to_json(limit_per_table=limit_per_table))
+
+        with self._lock:
+            self._key = key
+            self._value = value
+            self._built_at = time.monotonic()
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._key = None
+            self._value = None
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "data_version": data_version(),
+            "size": len(self._value) if self._value else 0,
+        }
+
+snapshot_cache = SnapshotCache(max_age=int(os.environ.get("CHATBOT_SNAPSHOT_MAX_AGE", 60)))
+
+# --- LRU cache ---
+class LRUCache:
+    """
+    Thread-safe LRU map bounded by number of entries, with hit/miss/eviction counters.
+    """
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 3) if total else 0,
+        }
+
+# --- LRU cache with expiry ---
+class TTLCache(LRUCache):
+    """
+    LRUCache whose entries also expire max_age seconds after they were stored.
+    An expired entry counts as a miss and as an expiration.
+    """
+    def __init__(self, max_entries=256, max_age=60):
+        super().__init__(max_entries)
+        self.max_age = max_age
+        self.expirations = 0
+
+    def get(self, key):
+        entry = super().get(key)
+        if entry is None:
+            return None
+        value, stored_at = entry
+        if time.monotonic() - stored_at < self.max_age:
+            return value
+        with self._lock:
+            self.hits -= 1
+            self.misses += 1
+            self.expirations += 1
+            if self._data.get(key) is entry:
+                del self._data[key]
+        return None
+
+    def put(self, key, value):
+        super().put(key, (value, time.monotonic()))
+
+    def stats(self):
+        stats = super().stats()
+        stats["max_age"] = self.max_age
+        stats["expirations"] = self.expirations
+        return stats
+
+# --- Logged-in users ---
+# Column values of a user, enough to rebuild the object Flask-Login needs
+# without a query. Writes in this process invalidate the entry; the max age
+# bounds how long a change made by another worker can go unseen.
+USER_COLUMNS = tuple(attr.key for attr in Users.__mapper__.column_attrs)
+
+user_cache = TTLCache(max_entries=int(os.environ.get("USER_CACHE_SIZE", 1024)),
+                      max_age=int(os.environ.get("USER_CACHE_TTL", 60)))
+
+def user_record(user):
+    return {key: getattr(user, key) for key in USER_COLUMNS}
+
+def user_from_record(record):
+    """
+    Attach a cached user to the session as if it had just been loaded, so it
+    can still be edited and committed. No SQL is emitted.
+    """
+    user = Users(**record)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+# --- Parsed PDF results ---
+class ParseResultCache(LRUCache):
+    """
+    Parsed invoice fields keyed by the SHA-256 of the PDF bytes.
+    Only the PDF's own fields are cached; vendor matching is done on every read
+    so it always reflects the current vendors. With a directory set, results
+    are also kept on disk and survive restarts.
+    """
+    def __init__(self, max_entries=512, directory=None, max_disk_entries=10000):
+        super().__init__(max_entries)
+        self.directory = directory
+        self.max_disk_entries = max_disk_entries
+        self.disk_hits = 0
+        self._puts = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(pdf_bytes):
+        return hashlib.sha256(pdf_bytes).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        fields = super().get(key)
+        if fields is None and self.directory:
+            try:
+                with open(self._path(key)) as f:
+                    fields = json.load(f)
+            except (OSError, ValueError):
+                return None
+            with self._lock:
+                self.misses -= 1
+                self.hits += 1
+                self.disk_hits += 1
+            super().put(key, fields)
+        return dict(fields) if fields is not None else None
+
+    def put(self, key, fields):
+        fields = dict(fields)
+        super().put(key, fields)
+        if not self.directory:
+            return
+
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(fields, f)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            return
+
+        self._puts += 1
+        if self._puts % 64 == 0:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        # Drop the least recently written files once the disk tier is over its limit
+        entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".json")]
+        if len(entries) <= self.max_disk_entries:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_disk_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def stats(self):
+        stats = super().stats()
+        stats["disk_hits"] = self.disk_hits
+        stats["directory"] = self.directory
+        return stats
+
+parse_cache = ParseResultCache(max_entries=int(os.environ.get("PDF_CACHE_SIZE", 512)),
+                               directory=os.environ.get("PDF_CACHE_DIR") or None)
\ No newline at end of file
@@ -0,0 +1,200 @@
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import IntegrityError
+from models import db, ChatMessages, ChatSummaries
+from database.database_helpers import dialect_insert
+
+CHAT_MODEL = "gemini-2.5-flash"
+
+# --- Model clients ---
+class FakeModels:
+    """
+    Stands in for genai's client.models so the chatbot works offline.
+    Answers by echoing the last question, split into a few chunks.
+    """
+    def __init__(self, chunk_size=12, delay=0):
+        self.chunk_size = chunk_size
+        self.delay = delay
+
+    def _answer(self, contents):
+        question = ""
+        for line in contents.splitlines():
+            if line.startswith("User: "):
+                question = line[len("User: "):]
+        return f"(offline model) You asked: {question}"
+
+    def generate_content(self, model, contents):
+        return FakeResponse(self._answer(contents))
+
+    def generate_content_stream(self, model, contents):
+        answer = self._answer(contents)
+        for start in range(0, len(answer), self.chunk_size):
+            if self.delay:
+                time.sleep(self.delay)
+            yield FakeResponse(answer[start:start + self.chunk_size])
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeModelClient:
+    def __init__(self, chunk_size=12, delay=0):
+        self.models = FakeModels(chunk_size, delay)
+
+def response_text(response):
+    # Handle Gemini response structure (full responses and stream chunks)
+    if hasattr(response, "text"):
+        return response.text or ""
+    if hasattr(response, "candidates"):
+        return response.candidates[0].content or ""
+    return str(response)
+
+# --- Conversation store ---
+# Messages live in chat_messages; the cookie session only carries the key.
+# Messages that are folded into the summary and no longer displayed are deleted.
+RECENT_MESSAGES_MIN = 4       # always sent in full, whatever the budget
+HISTORY_TOKEN_BUDGET = 2000   # for the recent messages sent in full
+SUMMARY_MAX_CHARS = 2000
+SUMMARY_LINE_CHARS = 200
+DISPLAY_MESSAGES = 100
+
+def estimate_tokens(text):
+    # Roughly four characters per token for English text
+    return len(text) // 4 + 1
+
+def new_conversation_key():
+    return uuid.uuid4().hex
+
+def add_message(key, role, content):
+    db.session.add(ChatMessages(conversation_key=key, role=role, content=content))
+    db.session.commit()
+
+def recent_messages(key, limit=DISPLAY_MESSAGES):
+    rows = db.session.query(ChatMessages.role, ChatMessages.content) \
+        .filter(ChatMessages.conversation_key == key) \
+        .order_by(ChatMessages.id.desc()) \
+        .limit(limit).all()
+    return [{"role": row.role, "content": row.content} for row in reversed(rows)]
+
+def fold_into_summary(summary, messages):
+    lines = [summary] if summary else []
+    for msg in messages:
+        role = "User" if msg.role == "user" else "Assistant"
+        content = " ".join(msg.content.split())
+        if len(content) > SUMMARY_LINE_CHARS:
+            content = content[:SUMMARY_LINE_CHARS] + "..."
+        lines.append(f"{role}: {content}")
+    summary = "\n".join(lines)
+    # Keep the newest part of the summary when it gets too long
+    if len(summary) > SUMMARY_MAX_CHARS:
+        summary = summary[-SUMMARY_MAX_CHARS:]
+        summary = summary[summary.find("\n") + 1:]
+    return summary
+
+def history_for_prompt(key, token_budget=HISTORY_TOKEN_BUDGET):
+    """
+    Returns (summary, recent) for the prompt: the newest messages that fit the
+    token budget in full, and a cached summary of everything older.
+    """
+    recent = []
+    used = 0
+    candidates = ChatMessages.query \
+        .filter(ChatMessages.conversation_key == key) \
+        .order_by(ChatMessages.id.desc()) \
+        .limit(DISPLAY_MESSAGES).all()
+    for msg in candidates:
+        cost = estimate_tokens(msg.content)
+        if len(recent) >= RECENT_MESSAGES_MIN and used + cost > token_budget:
+            break
+        recent.append(msg)
+        used += cost
+    recent.reverse()
+
+    summary_row = db.session.query(ChatSummaries.summary, ChatSummaries.summarized_through) \
+        .filter(ChatSummaries.conversation_key == key).first()
+    summary = summary_row.summary if summary_row else ""
+    summarized_through = summary_row.summarized_through if summary_row else 0
+
+    # Fold only the messages that dropped out of the window since last time
+    if recent:
+        older = ChatMessages.query \
+            .filter(ChatMessages.conversation_key == key,
+                    ChatMessages.id > summarized_through,
+                    ChatMessages.id < recent[0].id) \
+            .order_by(ChatMessages.id).all()
+        if older:
+            summary = fold_into_summary(summary, older)
+            save_summary(key, summary, older[-1].id)
+            if len(candidates) == DISPLAY_MESSAGES:
+                # Older than anything the chatbot page shows, and already in the summary
+                ChatMessages.query \
+                    .filter(ChatMessages.conversation_key == key,
+                            ChatMessages.id <= older[-1].id,
+                            ChatMessages.id < candidates[-1].id) \
+                    .delete(synchronize_session=False)
+            db.session.commit()
+
+    return summary, [{"role": msg.role, "content": msg.content} for msg in recent]
+
+def save_summary(key, summary, summarized_through):
+    """
+    Insert or update the summary row in one statement, so two questions on the
+    same conversation cannot both insert it. The summary covering more messages wins.
+    """
+    values = dict(conversation_key=key, summary=summary, summarized_through=summarized_through)
+    statement = dialect_insert(ChatSummaries)
+    if statement is not None:
+        statement = statement.values(values)
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=['conversation_key'],
+            set_={'summary': statement.excluded.summary,
+                  'summarized_through': statement.excluded.summarized_through},
+            where=ChatSummaries.summarized_through < statement.excluded.summarized_through))
+        return
+
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(ChatSummaries).values(values))
+    except IntegrityError:
+        db.session.query(ChatSummaries) \
+            .filter(ChatSummaries.conversation_key == key,
+                    ChatSummaries.summarized_through < summarized_through) \
+            .update({ChatSummaries.summary: summary, ChatSummaries.summarized_through: summarized_through},
+                    synchronize_session=False)
+
+def prune_idle_conversations(days):
+    """
+    Delete the messages and summary of every conversation with no message in
+    the last `days` days. Returns the number of conversations deleted.
+    """
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days)
+    keys = db.session.execute(
+        select(ChatMessages.conversation_key)
+        .group_by(ChatMessages.conversation_key)
+        .having(func.max(ChatMessages.created_at) < cutoff)
+    ).scalars().all()
+    for start in range(0, len(keys), 500):
+        batch = keys[start:start + 500]
+        ChatMessages.query.filter(ChatMessages.conversation_key.in_(batch)).delete(synchronize_session=False)
+        ChatSummaries.query.filter(ChatSummaries.conversation_key.in_(batch)).delete(synchronize_session=False)
+    db.session.commit()
+    return len(keys)
+
+# --- Prompt ---
+def build_prompt(base_prompt, json_str, conversation, summary=None):
+    prompt = f"{base_prompt}\n\nHere is the database:\n{json_str}\n\n"
+    if summary:
+        prompt += f"Summary of the earlier conversation:\n{summary}\n\n"
+    for msg in conversation:
+        role = "User" if msg["role"] == "user" else "Assistant"
+        prompt += f"{role}: {msg['content']}\n"
+    prompt += "Assistant:"
+    return prompt
+
+# --- Server-Sent Events ---
+def sse_event(data, event=None):
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data)}\n\n"
@@ -1,7 +1,14 @@
 def seed_all():
+    from database import rebuild_vendor_rollup
+    from models import VendorMonthlySpend
+
     seed_default_users()
     seed_default_vendors()
-    seed_default_invoices()
+    invoices_added = seed_default_invoices()
+
+    if invoices_added or not VendorMonthlySpend.query.first():
+        rebuild_vendor_rollup()
+        print("Vendor spend rollup rebuilt!")
 
 def seed_default_users():
     from app import db
@@ -51,9 +58,12 @@ def seed_default_users():
         },
     ]
 
+    # One lookup for all default usernames instead of one per user
+    existing = {username for (username,) in db.session.query(Users.username)
+                .filter(Users.username.in_([u["username"] for u in default_users]))}
+
     for u in default_users:
-        existing = Users.query.filter_by(username=u["username"]).first()
-        if not existing:
+        if u["username"] not in existing:
             user = Users(
                 username=u["username"],
                 first_name=u["first_name"],
@@ -142,12 +152,12 @@ def seed_default_invoices():
 
     if not users or not vendors:
         print("Cannot seed invoices: users or vendors missing.")
-        return
+        return False
 
     existing_invoices = Invoices.query.count()
     if existing_invoices > 0:
         print("Invoices already exist. Skipping seeding.")
-        return
+        return False
 
     invoice_list = []
     base_date = datetime.now() - timedelta(days=90)
@@ -173,4 +183,5 @@ def seed_default_invoices():
 
     db.session.add_all(invoice_list)
     db.session.commit()
-    print("Default invoices added!")
\ No newline at end of file
+    print("Default invoices added!")
+    return True
\ No newline at end of file
@@ -1,3 +1,7 @@
-from .database_helpers import get_user_by_id, get_all_users
+from .database_helpers import get_user_by_id, get_all_users, get_users_page, get_user_fields, USER_API_FIELDS, get_user_directory_page, get_invoice_page, get_invoice_totals, get_vendor_spend, ANALYTIC_BUCKETS
+from .database_helpers import apply_invoice_to_rollup, apply_invoice_rows_to_rollup, rebuild_vendor_rollup
+from .database_helpers import get_invoice_api_page, get_invoice_api_item, invoice_api_filters
+from .database_helpers import get_vendor_api_page, get_vendor_api_item, vendor_api_filters
+from .database_helpers import write_invoice_batch, INVOICE_WRITE_MODES
 
 __all__ = ['db', 'get_user_bu_id']
\ No newline at end of file
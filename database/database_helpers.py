@@ -1,7 +1,666 @@
-from models import db, Users
+import base64
+import json
+import calendar
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import func, or_, and_, select, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only
+from models import db, Users, Vendors, Invoices, VendorMonthlySpend
+
+INVOICES_PER_PAGE = 50
+
+# Columns the invoice list can be sorted on, keyed by the name used in the URL
+INVOICE_SORT_COLUMNS = {
+    'date': Invoices.date,
+    'invoice_number': Invoices.invoice_number,
+    'vendor': Vendors.vendor_name,
+    'amount': Invoices.amount,
+    'tax': func.coalesce(Invoices.tax, 0),
+}
+
+# How a cursor value is turned back into a python value for each sort column
+CURSOR_PARSERS = {
+    'date': date.fromisoformat,
+    'amount': Decimal,
+    'tax': Decimal,
+}
+
+# Escape character for LIKE patterns built by contains_pattern
+LIKE_ESCAPE = '\\'
+
+# Columns the users API can return; password_hash is never exposed
+USER_API_FIELDS = ('id', 'username', 'first_name', 'last_name', 'email', 'date_created')
+USERS_PER_PAGE = 100
+MAX_USERS_PER_PAGE = 1000
+USER_DIRECTORY_PAGE_SIZE = 50
+
+def contains_pattern(text):
+    """
+    LIKE pattern matching text anywhere, with % and _ taken literally.
+    Use it with escape=LIKE_ESCAPE.
+    """
+    for char in (LIKE_ESCAPE, '%', '_'):
+        text = text.replace(char, LIKE_ESCAPE + char)
+    return f"%{text}%"
 
 def get_all_users():
     return Users.query.all()
 
 def get_user_by_id(id):
-    return Users.query.get_or_404(id)
\ No newline at end of file
+    return Users.query.get_or_404(id)
+
+def user_row_to_dict(row, fields):
+    item = {}
+    for name in fields:
+        value = getattr(row, name)
+        item[name] = value.isoformat() if name == 'date_created' and value else value
+    return item
+
+def get_users_page(fields=USER_API_FIELDS, cursor=None, limit=USERS_PER_PAGE):
+    """
+    Users ordered by id, selecting only the requested columns.
+    Returns (list of dicts, next_cursor); next_cursor is None on the last page.
+    """
+    columns = [getattr(Users, name) for name in fields]
+    if 'id' not in fields:
+        columns.append(Users.id)
+
+    query = db.session.query(*columns).order_by(Users.id)
+    if cursor:
+        _, last_id = decode_cursor(cursor, 'id')
+        query = query.filter(Users.id > last_id)
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].id, rows[-1].id)
+
+    return [user_row_to_dict(row, fields) for row in rows], next_cursor
+
+def get_user_fields(id, fields=USER_API_FIELDS):
+    columns = [getattr(Users, name) for name in fields]
+    row = db.session.query(*columns).filter(Users.id == id).first()
+    return user_row_to_dict(row, fields) if row else None
+
+def get_user_directory_page(search=None, cursor=None, limit=USER_DIRECTORY_PAGE_SIZE):
+    """
+    One page of the user directory ordered by username, without the guest.
+    Every search word must appear in the username, first or last name.
+    Only the displayed columns are loaded; password hashes never leave the database.
+    Returns (users, next_cursor); next_cursor is None on the last page.
+    """
+    query = Users.query.options(load_only(Users.username, Users.first_name, Users.last_name)) \
+        .filter(Users.username != 'guest')
+
+    for word in (search or '').split():
+        pattern = contains_pattern(word)
+        query = query.filter(or_(Users.username.ilike(pattern, escape=LIKE_ESCAPE),
+                                 Users.first_name.ilike(pattern, escape=LIKE_ESCAPE),
+                                 Users.last_name.ilike(pattern, escape=LIKE_ESCAPE)))
+
+    if cursor:
+        cursor_value, cursor_id = decode_cursor(cursor, 'username')
+        query = query.filter(keyset_filter(Users.username, Users.id, cursor_value, cursor_id, 'asc'))
+
+    users = query.order_by(Users.username, Users.id).limit(limit + 1).all()
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor(users[-1].username, users[-1].id)
+    return users, next_cursor
+
+# --- Keyset cursors ---
+def encode_cursor(value, row_id):
+    if isinstance(value, date):
+        value = value.isoformat()
+    elif isinstance(value, Decimal):
+        value = str(value)
+    raw = json.dumps([value, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(cursor, sort='date'):
+    """
+    Returns (sort value, id) from a cursor made by encode_cursor.
+    Raises ValueError if the cursor was tampered with or is malformed.
+    """
+    try:
+        value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        parser = CURSOR_PARSERS.get(sort)
+        if parser and value is not None:
+            value = parser(value)
+        return value, int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def keyset_filter(sort_col, id_col, cursor_value, cursor_id, direction='desc'):
+    # Rows strictly after (cursor_value, cursor_id) in the requested order
+    if direction == 'asc':
+        return or_(sort_col > cursor_value,
+                   and_(sort_col == cursor_value, id_col > cursor_id))
+    return or_(sort_col < cursor_value,
+               and_(sort_col == cursor_value, id_col < cursor_id))
+
+# --- Invoice list ---
+def invoice_search_filter(search):
+    """
+    Invoices where every search word is in the number or description, or in
+    the vendor name; words may match different columns. Uses the full-text
+    index when there is one, and the plain substring search otherwise.
+    """
+    from search import fts_available, search_words, invoice_match_ids, vendor_name_match_ids
+
+    words = search_words(search)
+    if not words or not fts_available():
+        pattern = contains_pattern(search)
+        return or_(Invoices.invoice_number.ilike(pattern, escape=LIKE_ESCAPE),
+                   Vendors.vendor_name.ilike(pattern, escape=LIKE_ESCAPE),
+                   Invoices.description.ilike(pattern, escape=LIKE_ESCAPE))
+    return and_(*[or_(Invoices.id.in_(invoice_match_ids(word)),
+                      Invoices.vendor_id.in_(vendor_name_match_ids(word)))
+                  for word in words])
+
+def get_invoice_page(search=None, sort='date', direction='desc', cursor=None, limit=INVOICES_PER_PAGE):
+    """
+    One page of the invoice list, ordered by (sort column, id).
+    Vendor name comes from the same query so templates never lazy load vendors.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if sort not in INVOICE_SORT_COLUMNS:
+        sort = 'date'
+    if direction not in ('asc', 'desc'):
+        direction = 'desc'
+    sort_col = INVOICE_SORT_COLUMNS[sort]
+
+    query = db.session.query(
+        Invoices.id,
+        Invoices.invoice_number,
+        Invoices.date,
+        Vendors.vendor_name,
+        Invoices.amount,
+        Invoices.tax,
+        sort_col.label('sort_key'),
+    ).join(Vendors, Invoices.vendor_id == Vendors.id)
+
+    if search:
+        query = query.filter(invoice_search_filter(search))
+
+    if cursor:
+        cursor_value, cursor_id = decode_cursor(cursor, sort)
+        query = query.filter(keyset_filter(sort_col, Invoices.id, cursor_value, cursor_id, direction))
+
+    if direction == 'asc':
+        query = query.order_by(sort_col.asc(), Invoices.id.asc())
+    else:
+        query = query.order_by(sort_col.desc(), Invoices.id.desc())
+
+    # Fetch one extra row to know whether there is a next page
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].sort_key, rows[-1].id)
+
+    return rows, next_cursor
+
+def get_invoice_totals(search=None):
+    """
+    Count, amount and tax totals over every invoice matching the search,
+    not just the page being displayed.
+    """
+    query = db.session.query(
+        func.count(Invoices.id),
+        func.coalesce(func.sum(Invoices.amount), 0),
+        func.coalesce(func.sum(Invoices.tax), 0),
+    ).join(Vendors, Invoices.vendor_id == Vendors.id)
+
+    if search:
+        query = query.filter(invoice_search_filter(search))
+
+    count, amount, tax = query.one()
+    return {"count": count, "amount": float(amount), "tax": float(tax)}
+
+# --- Invoices and vendors API ---
+API_PAGE_SIZE = 100
+MAX_API_PAGE_SIZE = 1000
+
+INVOICE_API_COLUMNS = (
+    Invoices.id,
+    Invoices.invoice_number,
+    Invoices.date,
+    Invoices.vendor_id,
+    Vendors.vendor_name,
+    Invoices.user_id,
+    Invoices.amount,
+    Invoices.tax,
+    Invoices.description,
+    Invoices.created_at,
+)
+
+VENDOR_API_COLUMNS = (
+    Vendors.id,
+    Vendors.vendor_name,
+    Vendors.business_type,
+    Vendors.tax_id,
+    Vendors.country,
+    Vendors.city,
+    Vendors.postal_code,
+    Vendors.created_by,
+    Vendors.created_at,
+)
+
+def api_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+def rows_to_dicts(rows, columns):
+    # Plain tuples in, plain dicts out; no ORM objects are built
+    keys = [column.key for column in columns]
+    return [{key: api_value(value) for key, value in zip(keys, row)} for row in rows]
+
+def id_page(query, id_col, cursor, limit):
+    """
+    Applies id keyset pagination to query.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if cursor:
+        _, last_id = decode_cursor(cursor, 'id')
+        query = query.filter(id_col > last_id)
+    rows = query.order_by(id_col).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][0], rows[-1][0])
+    return rows, next_cursor
+
+def invoice_api_filters(vendor_ids=None, user_id=None, date_from=None, date_to=None,
+                        min_amount=None, max_amount=None):
+    filters = []
+    if vendor_ids:
+        filters.append(Invoices.vendor_id.in_(vendor_ids))
+    if user_id is not None:
+        filters.append(Invoices.user_id == user_id)
+    if date_from:
+        filters.append(Invoices.date >= date_from)
+    if date_to:
+        filters.append(Invoices.date <= date_to)
+    if min_amount is not None:
+        filters.append(Invoices.amount >= min_amount)
+    if max_amount is not None:
+        filters.append(Invoices.amount <= max_amount)
+    return filters
+
+def get_invoice_api_page(filters=(), cursor=None, limit=API_PAGE_SIZE):
+    """
+    Invoices ordered by id with the vendor name joined in, as dicts.
+    """
+    query = (db.session.query(*INVOICE_API_COLUMNS)
+             .join(Vendors, Invoices.vendor_id == Vendors.id)
+             .filter(*filters))
+    rows, next_cursor = id_page(query, Invoices.id, cursor, limit)
+    return rows_to_dicts(rows, INVOICE_API_COLUMNS), next_cursor
+
+def get_invoice_api_item(id):
+    row = (db.session.query(*INVOICE_API_COLUMNS)
+           .join(Vendors, Invoices.vendor_id == Vendors.id)
+           .filter(Invoices.id == id).first())
+    return rows_to_dicts([row], INVOICE_API_COLUMNS)[0] if row else None
+
+def vendor_api_filters(name=None, country=None, city=None, business_type=None):
+    filters = []
+    if name:
+        filters.append(Vendors.vendor_name.ilike(contains_pattern(name), escape=LIKE_ESCAPE))
+    if country:
+        filters.append(Vendors.country == country)
+    if city:
+        filters.append(Vendors.city == city)
+    if business_type:
+        filters.append(Vendors.business_type == business_type)
+    return filters
+
+def get_vendor_api_page(filters=(), cursor=None, limit=API_PAGE_SIZE):
+    query = db.session.query(*VENDOR_API_COLUMNS).filter(*filters)
+    rows, next_cursor = id_page(query, Vendors.id, cursor, limit)
+    return rows_to_dicts(rows, VENDOR_API_COLUMNS), next_cursor
+
+def get_vendor_api_item(id):
+    row = db.session.query(*VENDOR_API_COLUMNS).filter(Vendors.id == id).first()
+    return rows_to_dicts([row], VENDOR_API_COLUMNS)[0] if row else None
+
+# --- Vendor analytics ---
+ANALYTIC_BUCKETS = ('day', 'week', 'month')
+
+def date_bucket(column, bucket):
+    """
+    SQL expression truncating a date column to the start of its day, week (Monday) or month.
+    """
+    if db.session.get_bind().dialect.name == 'sqlite':
+        if bucket == 'day':
+            return func.date(column)
+        if bucket == 'week':
+            return func.date(column, 'weekday 0', '-6 days')
+        return func.strftime('%Y-%m-01', column)
+    return func.date_trunc(bucket, column)
+
+def get_vendor_spend(vendor_ids, start_date=None, end_date=None, bucket=None):
+    """
+    Invoice count, sums and averages per vendor in a single GROUP BY query.
+    With a bucket ('day', 'week' or 'month') there is one row per vendor per period.
+    Whole-month ranges are answered from the vendor_monthly_spend rollup.
+    """
+    if not vendor_ids:
+        return []
+
+    if bucket in (None, '', 'month') and rollup_covers(start_date, end_date):
+        return get_vendor_spend_from_rollup(vendor_ids, start_date, end_date, by_month=(bucket == 'month'))
+
+    tax = func.coalesce(Invoices.tax, 0)
+    columns = [
+        Invoices.vendor_id,
+        Vendors.vendor_name,
+        func.count(Invoices.id).label('count'),
+        func.sum(Invoices.amount).label('amount'),
+        func.sum(tax).label('tax'),
+        func.avg(Invoices.amount).label('avg_amount'),
+        func.avg(tax).label('avg_tax'),
+    ]
+    group_by = [Invoices.vendor_id, Vendors.vendor_name]
+
+    period = None
+    if bucket in ANALYTIC_BUCKETS:
+        period = date_bucket(Invoices.date, bucket).label('period')
+        columns.append(period)
+        group_by.append(period)
+
+    query = db.session.query(*columns) \
+        .join(Vendors, Invoices.vendor_id == Vendors.id) \
+        .filter(Invoices.vendor_id.in_(vendor_ids))
+
+    if start_date:
+        query = query.filter(Invoices.date >= start_date)
+    if end_date:
+        query = query.filter(Invoices.date <= end_date)
+
+    query = query.group_by(*group_by)
+    if period is not None:
+        query = query.order_by(Vendors.vendor_name, period)
+    else:
+        query = query.order_by(Vendors.vendor_name)
+
+    results = []
+    for row in query.all():
+        item = {
+            "vendor_id": row.vendor_id,
+            "vendor": row.vendor_name,
+            "count": row.count,
+            "amount": float(row.amount or 0),
+            "tax": float(row.tax or 0),
+            "avg_amount": round(float(row.avg_amount or 0), 2),
+            "avg_tax": round(float(row.avg_tax or 0), 2),
+        }
+        if period is not None:
+            value = row.period
+            item["period"] = value.date().isoformat() if hasattr(value, 'date') else str(value)
+        results.append(item)
+    return results
+
+
+# --- Vendor monthly spend rollup ---
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+def rollup_covers(start_date, end_date):
+    # The rollup only knows whole months
+    if start_date and start_date.day != 1:
+        return False
+    if end_date and end_date.day != calendar.monthrange(end_date.year, end_date.month)[1]:
+        return False
+    return True
+
+def apply_invoice_to_rollup(vendor_id, invoice_date, amount, tax, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) one invoice from the rollup.
+    Runs in the caller's session so it commits together with the invoice change.
+    """
+    amount = Decimal(str(amount or 0)) * sign
+    tax = Decimal(str(tax or 0)) * sign
+    apply_totals_to_rollup(vendor_id, month_start(invoice_date), sign, amount, tax)
+
+def apply_totals_to_rollup(vendor_id, month, count, amount, tax):
+    """
+    Add the deltas to one (vendor, month) row. Additions upsert in a single
+    statement, so two writers creating the same row cannot both insert it;
+    removals only update, since a missing row has nothing to take away.
+    """
+    if count < 0:
+        update_rollup_row(vendor_id, month, count, amount, tax)
+        return
+
+    values = dict(vendor_id=vendor_id, month=month, invoice_count=count, amount=amount, tax=tax)
+    statement = dialect_insert(VendorMonthlySpend)
+    if statement is not None:
+        statement = statement.values(values)
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=['vendor_id', 'month'],
+            set_={
+                'invoice_count': VendorMonthlySpend.invoice_count + statement.excluded.invoice_count,
+                'amount': VendorMonthlySpend.amount + statement.excluded.amount,
+                'tax': VendorMonthlySpend.tax + statement.excluded.tax,
+            }))
+        return
+
+    # No ON CONFLICT: update, else insert, else another writer inserted first and the update now applies
+    if update_rollup_row(vendor_id, month, count, amount, tax):
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(VendorMonthlySpend).values(values))
+    except IntegrityError:
+        update_rollup_row(vendor_id, month, count, amount, tax)
+
+def update_rollup_row(vendor_id, month, count, amount, tax):
+    # Number of rows updated, 0 when the (vendor, month) row does not exist yet
+    return db.session.query(VendorMonthlySpend) \
+        .filter_by(vendor_id=vendor_id, month=month) \
+        .update({
+            VendorMonthlySpend.invoice_count: VendorMonthlySpend.invoice_count + count,
+            VendorMonthlySpend.amount: VendorMonthlySpend.amount + amount,
+            VendorMonthlySpend.tax: VendorMonthlySpend.tax + tax,
+        }, synchronize_session=False)
+
+def apply_invoice_rows_to_rollup(rows, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) many invoices (dicts with vendor_id, date,
+    amount, tax) from the rollup, with one update per vendor and month rather
+    than per invoice.
+    """
+    totals = {}
+    for row in rows:
+        key = (row['vendor_id'], month_start(row['date']))
+        count, amount, tax = totals.get(key, (0, Decimal(0), Decimal(0)))
+        totals[key] = (count + sign,
+                       amount + Decimal(str(row['amount'] or 0)) * sign,
+                       tax + Decimal(str(row.get('tax') or 0)) * sign)
+
+    for (vendor_id, month), (count, amount, tax) in totals.items():
+        apply_totals_to_rollup(vendor_id, month, count, amount, tax)
+
+def rebuild_vendor_rollup():
+    """
+    Recompute the whole rollup from Invoices with one INSERT ... SELECT.
+    """
+    month = date_bucket(Invoices.date, 'month')
+    totals = select(
+        Invoices.vendor_id,
+        month,
+        func.count(Invoices.id),
+        func.coalesce(func.sum(Invoices.amount), 0),
+        func.coalesce(func.sum(Invoices.tax), 0),
+    ).group_by(Invoices.vendor_id, month)
+
+    db.session.query(VendorMonthlySpend).delete()
+    db.session.execute(
+        insert(VendorMonthlySpend).from_select(
+            ['vendor_id', 'month', 'invoice_count', 'amount', 'tax'], totals
+        )
+    )
+    db.session.commit()
+
+def get_vendor_spend_from_rollup(vendor_ids, start_date=None, end_date=None, by_month=False):
+    """
+    Same result shape as get_vendor_spend, read from vendor_monthly_spend.
+    """
+    count = func.sum(VendorMonthlySpend.invoice_count)
+    amount = func.sum(VendorMonthlySpend.amount)
+    tax = func.sum(VendorMonthlySpend.tax)
+
+    columns = [VendorMonthlySpend.vendor_id, Vendors.vendor_name,
+               count.label('count'), amount.label('amount'), tax.label('tax')]
+    group_by = [VendorMonthlySpend.vendor_id, Vendors.vendor_name]
+    if by_month:
+        columns.append(VendorMonthlySpend.month)
+        group_by.append(VendorMonthlySpend.month)
+
+    query = db.session.query(*columns) \
+        .join(Vendors, VendorMonthlySpend.vendor_id == Vendors.id) \
+        .filter(VendorMonthlySpend.vendor_id.in_(vendor_ids))
+
+    if start_date:
+        query = query.filter(VendorMonthlySpend.month >= month_start(start_date))
+    if end_date:
+        query = query.filter(VendorMonthlySpend.month <= month_start(end_date))
+
+    query = query.group_by(*group_by).having(count > 0)
+    if by_month:
+        query = query.order_by(Vendors.vendor_name, VendorMonthlySpend.month)
+    else:
+        query = query.order_by(Vendors.vendor_name)
+
+    results = []
+    for row in query.all():
+        row_count = row.count or 0
+        row_amount = float(row.amount or 0)
+        row_tax = float(row.tax or 0)
+        item = {
+            "vendor_id": row.vendor_id,
+            "vendor": row.vendor_name,
+            "count": row_count,
+            "amount": row_amount,
+            "tax": row_tax,
+            "avg_amount": round(row_amount / row_count, 2) if row_count else 0,
+            "avg_tax": round(row_tax / row_count, 2) if row_count else 0,
+        }
+        if by_month:
+            item["period"] = row.month.isoformat()
+        results.append(item)
+    return results
+
+# --- Batch invoice writes ---
+INVOICE_WRITE_MODES = ('skip', 'upsert')
+INVOICE_WRITE_BATCH_SIZE = 500
+# Columns an upsert overwrites; the invoice keeps its original user
+INVOICE_UPSERT_COLUMNS = ('date', 'vendor_id', 'amount', 'tax', 'description')
+
+def dialect_insert(model):
+    """
+    INSERT with ON CONFLICT support for the database in use, or None when
+    the dialect has none and callers must use their portable fallback.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as on_conflict_insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as on_conflict_insert
+    else:
+        return None
+    return on_conflict_insert(model)
+
+def insert_new_invoices(rows):
+    """
+    Insert the rows whose invoice_number is not taken yet.
+    Returns the set of invoice numbers inserted.
+    """
+    statement = dialect_insert(Invoices)
+    if statement is not None:
+        statement = statement.values(rows) \
+            .on_conflict_do_nothing(index_elements=['invoice_number']) \
+            .returning(Invoices.invoice_number)
+        return set(db.session.execute(statement).scalars())
+
+    # Portable fallback: skip the numbers that exist, then insert row by row,
+    # each in a savepoint so a number taken since the SELECT only skips that row
+    numbers = [row['invoice_number'] for row in rows]
+    taken = set(db.session.execute(
+        select(Invoices.invoice_number).where(Invoices.invoice_number.in_(numbers)).with_for_update()
+    ).scalars())
+    inserted = set()
+    for row in rows:
+        if row['invoice_number'] in taken:
+            continue
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(Invoices).values(row))
+        except IntegrityError:
+            continue
+        inserted.add(row['invoice_number'])
+    return inserted
+
+def write_invoice_batch(rows, mode='skip'):
+    """
+    Insert validated invoice dicts (invoice_number, date, vendor_id, user_id,
+    amount, tax, description), letting the invoice_number unique constraint
+    decide what already exists. Existing numbers are skipped, or updated when
+    mode is 'upsert'. Runs in the caller's transaction and keeps the rollup in step.
+    Returns {invoice_number: 'created' | 'updated' | 'unchanged' | 'skipped'}.
+    """
+    outcomes = {}
+    created = []
+    for start in range(0, len(rows), INVOICE_WRITE_BATCH_SIZE):
+        batch = rows[start:start + INVOICE_WRITE_BATCH_SIZE]
+        inserted = insert_new_invoices(batch)
+        for row in batch:
+            if row['invoice_number'] in inserted:
+                outcomes[row['invoice_number']] = 'created'
+                created.append(row)
+    apply_invoice_rows_to_rollup(created)
+
+    conflicts = [row for row in rows if row['invoice_number'] not in outcomes]
+    if mode != 'upsert':
+        outcomes.update((row['invoice_number'], 'skipped') for row in conflicts)
+        return outcomes
+
+    # Lock the conflicting rows and read their current values for the rollup
+    current = {}
+    columns = [getattr(Invoices, name) for name in INVOICE_UPSERT_COLUMNS]
+    for start in range(0, len(conflicts), INVOICE_WRITE_BATCH_SIZE):
+        numbers = [row['invoice_number'] for row in conflicts[start:start + INVOICE_WRITE_BATCH_SIZE]]
+        query = db.session.query(Invoices.id, Invoices.invoice_number, *columns) \
+            .filter(Invoices.invoice_number.in_(numbers)).with_for_update()
+        current.update((row.invoice_number, row) for row in query)
+
+    changes = []
+    old_rows = []
+    new_rows = []
+    for row in conflicts:
+        existing = current.get(row['invoice_number'])
+        if existing is None:
+            # Deleted by another writer since the insert
+            outcomes[row['invoice_number']] = 'skipped'
+            continue
+        if all(getattr(existing, name) == row[name] for name in INVOICE_UPSERT_COLUMNS):
+            outcomes[row['invoice_number']] = 'unchanged'
+            continue
+        changes.append({'id': existing.id, **{name: row[name] for name in INVOICE_UPSERT_COLUMNS}})
+        old_rows.append(existing._asdict())
+        new_rows.append(row)
+        outcomes[row['invoice_number']] = 'updated'
+
+    if changes:
+        db.session.execute(update(Invoices), changes)
+        apply_invoice_rows_to_rollup(old_rows, sign=-1)
+        apply_invoice_rows_to_rollup(new_rows)
+    return outcomes
\ No newline at end of file
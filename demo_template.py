@@ -0,0 +1,40 @@
+import os
+import sqlite3
+import time
+from models import db
+
+def template_path(app):
+    """
+    Where the seeded demo database image lives: DEMO_TEMPLATE_PATH, or
+    demo_template.db in the instance folder.
+    """
+    path = app.config.get('DEMO_TEMPLATE_PATH')
+    if not path:
+        os.makedirs(app.instance_path, exist_ok=True)
+        path = os.path.join(app.instance_path, 'demo_template.db')
+    return path
+
+def can_restore():
+    return db.engine.dialect.name == 'sqlite' and db.engine.url.database not in (None, '', ':memory:')
+
+def restore_template(path):
+    """
+    Copy the template image over the live database with the SQLite online
+    backup API. Runs in time proportional to the template, not to the data
+    being replaced, and readers in other processes see either the old or
+    the new database. Returns the elapsed seconds.
+    """
+    started = time.perf_counter()
+    db.session.remove()
+
+    source = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    target = db.engine.raw_connection()
+    try:
+        source.backup(target.driver_connection)
+    finally:
+        target.close()
+        source.close()
+
+    # Pooled connections may have cached the old schema
+    db.engine.dispose()
+    return time.perf_counter() - started
\ No newline at end of file
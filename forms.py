@@ -1,7 +1,8 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, SubmitField, PasswordField, DateTimeField, DateField, DecimalField, SelectField, FileField, SubmitField
+from wtforms import StringField, SubmitField, PasswordField, DateTimeField, DateField, DecimalField, SelectField, FileField, SubmitField, IntegerField
+from wtforms.widgets import HiddenInput
 from wtforms.validators import DataRequired, Email, Length, NumberRange, InputRequired, ValidationError, Optional
-from models import Vendors
+from models import db, Vendors
 
 class UserForm(FlaskForm):
     username = StringField('Username', validators=[DataRequired()])
@@ -60,20 +61,16 @@ class InvoiceForm(FlaskForm):
     
     invoice_number = StringField('Invoice Number', validators=[DataRequired()])
     date = DateField('Date', validators=[DataRequired()])
-    vendor_id = SelectField('Vendor', coerce=int, validators=[InputRequired()])
+    # Filled in by the vendor typeahead
+    vendor_id = IntegerField('Vendor', widget=HiddenInput(), validators=[InputRequired(message="Please select a vendor")])
     amount = DecimalField('Amount', validators=[NumberRange(min=0), DataRequired()])
     tax = DecimalField('Tax', validators=[NumberRange(min=0), Optional()])
     description = StringField('Description', validators=[Optional()])
     
     submit = SubmitField('Submit Invoice')
 
-    def set_vendor_choices(self):
-        choices = [(0, "-- Select Vendor --")]
-        choices += [(v.id, v.vendor_name) for v in Vendors.query.all()]
-        self.vendor_id.choices = choices
-
     def validate_vendor_id(self, field):
-        if field.data == 0:
+        if field.data is None or db.session.get(Vendors, field.data) is None:
             raise ValidationError("Please select a vendor")
         
 class EditInvoiceForm(FlaskForm):
@@ -81,18 +78,14 @@ class EditInvoiceForm(FlaskForm):
     
     invoice_number = StringField('Invoice Number', validators=[DataRequired()])
     date = DateField('Date', validators=[DataRequired()])
-    vendor_id = SelectField('Vendor', coerce=int, validators=[InputRequired()])
+    # Filled in by the vendor typeahead
+    vendor_id = IntegerField('Vendor', widget=HiddenInput(), validators=[InputRequired(message="Please select a vendor")])
     amount = DecimalField('Amount', validators=[NumberRange(min=0), DataRequired()])
     tax = DecimalField('Tax', validators=[NumberRange(min=0), Optional()])
     description = StringField('Description', validators=[Optional()])
     
     submit = SubmitField('Submit Invoice')
 
-    def set_vendor_choices(self):
-        choices = [(0, "-- Select Vendor --")]
-        choices += [(v.id, v.vendor_name) for v in Vendors.query.all()]
-        self.vendor_id.choices = choices
-
     def validate_vendor_id(self, field):
-        if field.data == 0:
+        if field.data is None or db.session.get(Vendors, field.data) is None:
             raise ValidationError("Please select a vendor")
\ No newline at end of file
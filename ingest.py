@@ -0,0 +1,260 @@
+import csv
+import io
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from werkzeug.datastructures import MultiDict
+from models import db, Invoices, Vendors
+from utilities import extract_invoice_fields, match_vendor
+from database import write_invoice_batch
+
+MAX_BULK_FILES = 1000
+CSV_CHUNK_SIZE = 1000
+MAX_REPORTED_PROBLEMS = 1000
+
+# --- Reading the input ---
+def read_pdf_files(source):
+    """
+    List (name, bytes) for every PDF in a directory, a zip file path or a
+    file-like zip upload.
+    """
+    if isinstance(source, str) and os.path.isdir(source):
+        files = []
+        for root, _, names in os.walk(source):
+            for name in sorted(names):
+                if name.lower().endswith('.pdf'):
+                    path = os.path.join(root, name)
+                    with open(path, 'rb') as f:
+                        files.append((os.path.relpath(path, source), f.read()))
+        return files
+
+    files = []
+    with zipfile.ZipFile(source) as archive:
+        for info in archive.infolist():
+            name = info.filename
+            if info.is_dir() or name.startswith('__MACOSX/') or not name.lower().endswith('.pdf'):
+                continue
+            files.append((name, archive.read(info)))
+    return files
+
+def _extract(pdf_bytes):
+    # Runs in a worker process; errors are returned so one bad file does not stop the batch
+    try:
+        return extract_invoice_fields(pdf_bytes), None
+    except Exception as e:
+        return None, f"Could not read PDF: {e}"
+
+# --- Validation ---
+def _invoice_row(fields, vendor_ids, user_id):
+    """
+    Returns (row, None) for a valid invoice or (None, reason).
+    """
+    if not fields.get('invoice_number'):
+        return None, "Missing invoice number"
+
+    try:
+        invoice_date = datetime.strptime(fields.get('date') or '', "%m/%d/%Y").date()
+    except ValueError:
+        return None, "Missing or unreadable date"
+
+    try:
+        amount = Decimal(str(fields['amount']))
+        tax = Decimal(str(fields['tax'])) if fields.get('tax') is not None else None
+    except (KeyError, InvalidOperation):
+        return None, "Missing or unreadable amount"
+    if amount < 0 or (tax is not None and tax < 0):
+        return None, "Amount and tax cannot be negative"
+
+    vendor_name = fields.get('vendor_name')
+    if not vendor_name:
+        return None, "Missing vendor"
+    if vendor_name not in vendor_ids:
+        vendor_ids[vendor_name] = match_vendor(dict(fields))['vendor_id']
+    if not vendor_ids[vendor_name]:
+        return None, f"Unknown vendor '{vendor_name}'"
+
+    return {
+        'invoice_number': fields['invoice_number'],
+        'date': invoice_date,
+        'vendor_id': vendor_ids[vendor_name],
+        'user_id': user_id,
+        'amount': amount,
+        'tax': tax,
+        'description': (fields.get('description') or None),
+    }, None
+
+# --- Ingestion ---
+def ingest_invoice_pdfs(files, user_id, workers=None, queue=None):
+    """
+    Parse the PDFs in parallel, on the queue's shared worker pool when one is
+    given, otherwise on a pool of its own. Invoices are written in one
+    transaction with ON CONFLICT DO NOTHING, so numbers that already exist,
+    including ones inserted concurrently, are skipped.
+    Returns one report entry per file: created, skipped or failed.
+    """
+    if len(files) > MAX_BULK_FILES:
+        raise ValueError(f"Too many files, the limit is {MAX_BULK_FILES} per batch.")
+    if not files:
+        return []
+
+    names = [name for name, _ in files]
+    payloads = [data for _, data in files]
+    if queue is not None:
+        extracted = queue.map(_extract, payloads)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            extracted = list(pool.map(_extract, payloads, chunksize=8))
+
+    report = []
+    valid = []
+    vendor_ids = {}
+    for name, (fields, error) in zip(names, extracted):
+        entry = {'file': name, 'invoice_number': fields.get('invoice_number') if fields else None}
+        report.append(entry)
+        if error is None:
+            row, error = _invoice_row(fields, vendor_ids, user_id)
+        if error:
+            entry.update(status='failed', reason=error)
+        else:
+            valid.append((entry, row))
+
+    rows = []
+    entries = {}
+    for entry, row in valid:
+        number = row['invoice_number']
+        if number in entries:
+            entry.update(status='skipped', reason="Duplicate invoice number in this batch")
+        else:
+            entries[number] = entry
+            rows.append(row)
+
+    if rows:
+        try:
+            outcomes = write_invoice_batch(rows, mode='skip')
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            for entry in entries.values():
+                entry.update(status='failed', reason=f"Batch insert failed: {e}")
+        else:
+            for number, outcome in outcomes.items():
+                if outcome == 'created':
+                    entries[number]['status'] = 'created'
+                else:
+                    entries[number].update(status='skipped', reason="Invoice number already exists")
+
+    return report
+
+def summarize_report(report):
+    summary = {'created': 0, 'skipped': 0, 'failed': 0}
+    for entry in report:
+        summary[entry['status']] += 1
+    return summary
+
+# --- CSV import ---
+def _csv_chunks(reader, size):
+    chunk = []
+    # Line 1 is the header
+    for line, record in enumerate(reader, start=2):
+        chunk.append((line, record))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _chunk_vendors(records):
+    """
+    The vendors named in one chunk, by id or by exact name, loaded with one
+    query. While the returned list is held they stay in the session's identity
+    map, so the form's primary key check per row runs no SQL.
+    Returns (vendors, ids by name).
+    """
+    ids = set()
+    names = set()
+    for record in records:
+        vendor_id = (record.get('vendor_id') or '').strip()
+        if vendor_id.isdigit():
+            ids.add(int(vendor_id))
+        elif record.get('vendor_name'):
+            names.add(record['vendor_name'].strip())
+
+    vendors = []
+    if ids or names:
+        vendors = Vendors.query.filter(Vendors.id.in_(ids) | Vendors.vendor_name.in_(names)).all()
+    return vendors, {vendor.vendor_name: vendor.id for vendor in vendors}
+
+def _form_errors(form):
+    return "; ".join(f"{getattr(form, field).label.text}: {error}"
+                     for field, errors in form.errors.items() for error in errors)
+
+def import_invoice_csv(stream, user_id, chunk_size=CSV_CHUNK_SIZE):
+    """
+    Create invoices from a CSV with a header row: invoice_number, date
+    (YYYY-MM-DD), vendor_id or vendor_name, amount, tax, description. The
+    columns of the CSV export are accepted as they are.
+    Each chunk is validated with InvoiceForm, written with one batched
+    insert that skips existing invoice numbers, and committed, so a rerun
+    after a failure picks up where it stopped.
+    Returns (summary, problems) with problems listing rows not created.
+    """
+    from forms import InvoiceForm
+
+    reader = csv.DictReader(stream)
+    missing = {'invoice_number', 'date', 'amount'} - set(reader.fieldnames or ())
+    if missing or not {'vendor_id', 'vendor_name'} & set(reader.fieldnames or ()):
+        raise ValueError("CSV needs invoice_number, date, vendor_id or vendor_name, and amount columns.")
+
+    summary = {'created': 0, 'skipped': 0, 'failed': 0}
+    problems = []
+
+    def problem(line, number, status, reason):
+        summary[status] += 1
+        if len(problems) < MAX_REPORTED_PROBLEMS:
+            problems.append({'line': line, 'invoice_number': number, 'status': status, 'reason': reason})
+
+    for chunk in _csv_chunks(reader, chunk_size):
+        vendors, ids_by_name = _chunk_vendors([record for _, record in chunk])
+        rows = []
+        lines = {}
+        for line, record in chunk:
+            data = MultiDict({key: (value or '').strip() for key, value in record.items() if key})
+            if not data.get('vendor_id', '').isdigit():
+                data['vendor_id'] = str(ids_by_name.get(data.get('vendor_name'), 0))
+
+            form = InvoiceForm(formdata=data, meta={'csrf': False})
+            if not form.validate():
+                problem(line, data.get('invoice_number'), 'failed', _form_errors(form))
+                continue
+
+            number = form.invoice_number.data
+            if number in lines:
+                problem(line, number, 'skipped', f"Duplicate of line {lines[number]}")
+                continue
+            lines[number] = line
+            rows.append({
+                'invoice_number': number,
+                'date': form.date.data,
+                'vendor_id': form.vendor_id.data,
+                'user_id': user_id,
+                'amount': form.amount.data,
+                'tax': form.tax.data,
+                'description': form.description.data or None,
+            })
+
+        if rows:
+            try:
+                outcomes = write_invoice_batch(rows, mode='skip')
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            for number, outcome in outcomes.items():
+                if outcome == 'created':
+                    summary['created'] += 1
+                else:
+                    problem(lines[number], number, 'skipped', "Invoice number already exists")
+
+    return summary, problems
\ No newline at end of file
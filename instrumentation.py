@@ -0,0 +1,118 @@
+import json
+import logging
+import time
+from collections import defaultdict
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("sql_instrumentation")
+
+class RequestQueryStats:
+    """
+    Queries run while serving one request, grouped by statement text.
+    Lazy loads in a loop run the same SQL with different parameters, so a
+    statement seen many times is the signature of an N+1 pattern.
+    """
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = defaultdict(lambda: [0, 0.0])
+
+    def record(self, statement, seconds):
+        self.count += 1
+        self.seconds += seconds
+        entry = self.statements[statement]
+        entry[0] += 1
+        entry[1] += seconds
+
+    def repeated(self, threshold):
+        # [(statement, count, seconds)] run at least threshold times, worst first
+        found = [(statement, count, seconds) for statement, (count, seconds) in self.statements.items()
+                 if count >= threshold]
+        return sorted(found, key=lambda item: -item[1])
+
+# The start time lives on the execution context, which is dropped with the
+# statement, so a query that raises leaves nothing behind on the connection
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and has_request_context() and "sql_stats" in g:
+        context._query_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started", None)
+    if started is not None and has_request_context() and "sql_stats" in g:
+        g.sql_stats.record(statement, time.perf_counter() - started)
+
+def init_instrumentation(app):
+    """
+    Count and time the SQL of every request when SQL_INSTRUMENTATION is set.
+    Adds X-Query-Count and Server-Timing headers and logs one JSON line per
+    request, at warning level when a statement repeats SQL_N_PLUS_ONE_THRESHOLD
+    times or more. Queries run while a streamed body is sent are not counted.
+    """
+    if not app.config.get("SQL_INSTRUMENTATION"):
+        return
+    threshold = app.config.get("SQL_N_PLUS_ONE_THRESHOLD", 5)
+
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+    # Handlers are left to the app or the deployment (e.g. gunicorn's logging config)
+    logger.setLevel(logging.INFO)
+
+    @app.before_request
+    def start_query_stats():
+        g.sql_stats = RequestQueryStats()
+        g.sql_request_started = time.perf_counter()
+
+    @app.after_request
+    def report_query_stats(response):
+        stats = g.pop("sql_stats", None)
+        if stats is None:
+            return response
+        sql_ms = round(stats.seconds * 1000, 2)
+        request_ms = round((time.perf_counter() - g.pop("sql_request_started")) * 1000, 2)
+        repeated = stats.repeated(threshold)
+
+        response.headers["X-Query-Count"] = str(stats.count)
+        response.headers.add("Server-Timing", f'db;dur={sql_ms};desc="{stats.count} queries"')
+
+        record = {
+            "event": "sql_per_request",
+            "method": request.method,
+            "path": request.path,
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            "queries": stats.count,
+            "distinct_queries": len(stats.statements),
+            "sql_ms": sql_ms,
+            "request_ms": request_ms,
+            "n_plus_one": [{"statement": " ".join(statement.split())[:200], "count": count,
+                            "ms": round(seconds * 1000, 2)}
+                           for statement, count, seconds in repeated],
+        }
+        if repeated:
+            response.headers["X-Query-Repeated"] = str(sum(count for _, count, _ in repeated))
+        logger.log(logging.WARNING if repeated else logging.INFO, json.dumps(record))
+        return response
+
+# --- Startup time ---
+startup_logger = logging.getLogger("startup")
+
+def track_startup(app, import_started):
+    """
+    Record how long importing the app took and, on the first request, how long
+    it took from the start of the import to that request being served.
+    Kept in app.config['STARTUP_TIMINGS'] and logged once per process.
+    """
+    timings = {"import_ms": round((time.perf_counter() - import_started) * 1000, 1)}
+    app.config["STARTUP_TIMINGS"] = timings
+
+    @app.after_request
+    def report_startup(response):
+        if "first_request_ms" not in timings:
+            timings["first_request_ms"] = round((time.perf_counter() - import_started) * 1000, 1)
+            timings["first_path"] = request.path
+            startup_logger.info(json.dumps({"event": "startup", **timings}))
+        return response
\ No newline at end of file
@@ -0,0 +1,163 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from cache import parse_cache
+from utilities import extract_invoice_fields
+
+class QueueFull(Exception):
+    pass
+
+class QueueUnavailable(Exception):
+    pass
+
+class PdfParseQueue:
+    """
+    Runs extract_invoice_fields in a pool of worker processes so request
+    workers only hand the PDF over and return a job id.
+    At most max_pending jobs can be queued or running at once.
+    """
+    def __init__(self, workers=2, max_pending=16, result_ttl=600):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self._executor = None
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._pending = 0
+
+    def _get_executor(self):
+        # Created on first use so each gunicorn worker gets its own pool
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _submit(self, fn, *args):
+        """
+        executor.submit, called with self._lock held. A worker that dies breaks
+        the whole pool, so a broken pool is dropped (the next call starts a
+        fresh one) and QueueUnavailable is raised.
+        """
+        try:
+            return self._get_executor().submit(fn, *args)
+        except (BrokenProcessPool, RuntimeError) as e:
+            self._discard(self._executor)
+            raise QueueUnavailable("PDF parsing workers are restarting, please try again shortly.") from e
+
+    def _discard(self, executor):
+        # With self._lock held; another thread may already have replaced it
+        if executor is not None and self._executor is executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def map(self, fn, items):
+        """
+        [fn(item) for item in items] on the shared pool, for batch work that
+        waits for all its results. Items count as pending like submitted jobs,
+        and one batch keeps at most half of max_pending in flight, so interactive
+        parses always have room and queue behind a bounded number of batch items.
+        Raises QueueUnavailable if the pool breaks.
+        """
+        window = max(1, self.max_pending // 2)
+        futures = []
+        in_flight = set()
+        executor = None
+        try:
+            for item in items:
+                while True:
+                    with self._lock:
+                        if len(in_flight) < window and self._pending < self.max_pending:
+                            future = self._submit(fn, item)
+                            executor = self._executor
+                            self._pending += 1
+                            break
+                    if in_flight:
+                        in_flight = wait(in_flight, return_when=FIRST_COMPLETED).not_done
+                    else:
+                        time.sleep(0.05)  # the slots are taken by interactive jobs
+                future.add_done_callback(self._release)
+                futures.append(future)
+                in_flight.add(future)
+            return [future.result() for future in futures]
+        except BrokenProcessPool as e:
+            with self._lock:
+                self._discard(executor)
+            raise QueueUnavailable("PDF parsing workers are restarting, please try again shortly.") from e
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def _expire(self):
+        now = time.monotonic()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job["finished_at"] and now - job["finished_at"] > self.result_ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def submit(self, pdf_bytes, owner=None):
+        key = parse_cache.key(pdf_bytes)
+        cached = parse_cache.get(key)
+
+        with self._lock:
+            self._expire()
+            job_id = uuid.uuid4().hex
+
+            # Already parsed before: finished job, no worker needed
+            if cached is not None:
+                future = Future()
+                future.set_result(cached)
+                self._jobs[job_id] = {"owner": owner, "future": future,
+                                      "cached": True, "finished_at": time.monotonic()}
+                return job_id
+
+            if self._pending >= self.max_pending:
+                raise QueueFull("PDF parsing queue is full, please try again shortly.")
+
+            # Recorded only once the pool has accepted it
+            future = self._submit(extract_invoice_fields, pdf_bytes)
+            job = {"owner": owner, "future": future, "cached": False, "finished_at": None}
+            self._jobs[job_id] = job
+            self._pending += 1
+
+        job["future"].add_done_callback(lambda future: self._finished(job, key))
+        return job_id
+
+    def _finished(self, job, key):
+        future = job["future"]
+        if not future.cancelled() and future.exception() is None:
+            parse_cache.put(key, future.result())
+        with self._lock:
+            self._pending -= 1
+            job["finished_at"] = time.monotonic()
+
+    def status(self, job_id, owner=None):
+        """
+        Returns None for unknown jobs (or jobs of another owner), otherwise a dict
+        with 'status' of queued, running, done or failed, plus 'fields' or 'error'.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job["owner"] != owner:
+            return None
+
+        future = job["future"]
+        if not future.done():
+            return {"status": "running" if future.running() else "queued"}
+
+        error = future.exception()
+        if error is not None:
+            return {"status": "failed", "error": str(error)}
+        return {"status": "done", "fields": dict(future.result()), "cached": job["cached"]}
+
+    def stats(self):
+        with self._lock:
+            return {"pending": self._pending, "jobs": len(self._jobs), "max_pending": self.max_pending}
+
+pdf_queue = PdfParseQueue(workers=int(os.environ.get("PDF_PARSE_WORKERS", 2)),
+                          max_pending=int(os.environ.get("PDF_PARSE_QUEUE_SIZE", 16)))
\ No newline at end of file
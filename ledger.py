@@ -0,0 +1,70 @@
+import csv
+import io
+import json
+from sqlalchemy import select
+from models import db, Users, Vendors, Invoices
+
+EXPORT_BATCH_SIZE = 2000
+
+# Export columns in output order: (name, column)
+LEDGER_COLUMNS = (
+    ('id', Invoices.id),
+    ('invoice_number', Invoices.invoice_number),
+    ('date', Invoices.date),
+    ('vendor_id', Invoices.vendor_id),
+    ('vendor_name', Vendors.vendor_name),
+    ('vendor_tax_id', Vendors.tax_id),
+    ('vendor_country', Vendors.country),
+    ('user_id', Invoices.user_id),
+    ('username', Users.username),
+    ('amount', Invoices.amount),
+    ('tax', Invoices.tax),
+    ('description', Invoices.description),
+    ('created_at', Invoices.created_at),
+)
+LEDGER_FIELDS = [name for name, _ in LEDGER_COLUMNS]
+
+def iter_ledger_batches(batch_size=EXPORT_BATCH_SIZE):
+    """
+    Yield lists of invoice rows joined to vendor and user, ordered by id,
+    fetching batch_size rows at a time from a server-side cursor.
+    """
+    statement = select(*[column for _, column in LEDGER_COLUMNS]) \
+        .join(Vendors, Invoices.vendor_id == Vendors.id) \
+        .join(Users, Invoices.user_id == Users.id) \
+        .order_by(Invoices.id) \
+        .execution_options(yield_per=batch_size)
+    result = db.session.execute(statement)
+    for batch in result.partitions():
+        yield batch
+
+def ledger_value(value):
+    # Dates as ISO strings, Decimals as their exact text
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if value is None:
+        return None
+    return value if isinstance(value, (int, str)) else str(value)
+
+def iter_ledger_csv(batch_size=EXPORT_BATCH_SIZE):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(LEDGER_FIELDS)
+    for batch in iter_ledger_batches(batch_size):
+        writer.writerows([['' if value is None else ledger_value(value) for value in row] for row in batch])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Header only when there are no invoices
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def iter_ledger_jsonl(batch_size=EXPORT_BATCH_SIZE):
+    for batch in iter_ledger_batches(batch_size):
+        yield "".join(json.dumps(dict(zip(LEDGER_FIELDS, map(ledger_value, row)))) + "\n"
+                      for row in batch)
+
+LEDGER_FORMATS = {
+    'csv': (iter_ledger_csv, 'text/csv'),
+    'jsonl': (iter_ledger_jsonl, 'application/x-ndjson'),
+}
\ No newline at end of file
@@ -1,9 +1,10 @@
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import Numeric, inspect
+from sqlalchemy import Numeric, inspect, select
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import date, datetime, timezone
 from decimal import Decimal
+import json
 
 db = SQLAlchemy()
 
@@ -56,6 +57,9 @@ class Vendors(db.Model):
 
 class Invoices(db.Model):
     __tablename__ = 'invoices'
+    __table_args__ = (
+        db.Index('ix_invoices_date_id', 'date', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     invoice_number = db.Column(db.String(64), nullable=False, unique=True)
@@ -73,39 +77,109 @@ class Invoices(db.Model):
 
     def __repr__(self):
         return f'<Invoice {self.invoice_number} - {self.vendor.vendor_name}>'
+
+class VendorMonthlySpend(db.Model):
+    # Rollup of invoice totals per vendor per month, kept in step with Invoices
+    __tablename__ = 'vendor_monthly_spend'
+
+    vendor_id = db.Column(db.Integer, db.ForeignKey('vendors.id'), primary_key=True)
+    month = db.Column(db.Date, primary_key=True)
+    invoice_count = db.Column(db.Integer, nullable=False, default=0)
+    amount = db.Column(Numeric(14, 2), nullable=False, default=0)
+    tax = db.Column(Numeric(14, 2), nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<VendorMonthlySpend {self.vendor_id} {self.month}>'
     
+class ChatMessages(db.Model):
+    __tablename__ = 'chat_messages'
+
+    id = db.Column(db.Integer, primary_key=True)
+    conversation_key = db.Column(db.String(32), nullable=False, index=True)
+    role = db.Column(db.String(16), nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=db.func.now())
+
+    def __repr__(self):
+        return f'<ChatMessage {self.conversation_key} {self.role}>'
+
+class ChatSummaries(db.Model):
+    # Running summary of the messages that no longer fit in the prompt
+    __tablename__ = 'chat_summaries'
+
+    conversation_key = db.Column(db.String(32), primary_key=True)
+    summary = db.Column(db.Text, nullable=False, default='')
+    summarized_through = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ChatSummary {self.conversation_key}>'
+
 # --- Convert table rows to JSON ---
+SENSITIVE_COLUMNS = frozenset(["password_hash"])
+# Chat history is private to each visitor and never exported
+PRIVATE_TABLES = frozenset(["chat_messages", "chat_summaries"])
+
+def public_tables():
+    return [(table_name, table_obj) for table_name, table_obj in db.metadata.tables.items()
+            if table_name not in PRIVATE_TABLES]
+
+def column_converter(column):
+    """
+    Pick the value converter for a column once, from its type,
+    instead of checking the type of every value.
+    """
+    if isinstance(column.type, (db.DateTime, db.Date)):
+        return lambda value: value.isoformat() if value is not None else None
+    if isinstance(column.type, Numeric):
+        return lambda value: float(value) if value is not None else None
+    return None
+
+def table_rows(table_obj, limit=None, batch_size=1000):
+    """
+    Yield the rows of a table as JSON-ready dicts, fetching batch_size rows at a time.
+    Sensitive columns are never selected.
+    """
+    columns = [col for col in table_obj.columns if col.name not in SENSITIVE_COLUMNS]
+    converters = [(col.name, column_converter(col)) for col in columns]
+
+    stmt = select(*columns)
+    if limit:
+        stmt = stmt.limit(limit)
+    result = db.session.execute(stmt.execution_options(yield_per=batch_size))
+
+    for row in result:
+        yield {name: convert(value) if convert else value
+               for (name, convert), value in zip(converters, row)}
+
 def table_to_json(limit_per_table=None):
     """
     Dynamically convert all tables in db.metadata to JSON.
     Works for modern Flask-SQLAlchemy.
     """
-    SENSITIVE_COLUMNS = ["password_hash"]
-    json_data = {}
-
-    for table_name, table_obj in db.metadata.tables.items():
-        query = db.session.query(table_obj)
-        if limit_per_table:
-            query = query.limit(limit_per_table)
-        rows = query.all()
-        
-        json_data[table_name] = []
-        for row in rows:
-            row_dict = {}
-            for col, value in zip(table_obj.columns, row):
-                if col.name in SENSITIVE_COLUMNS:
-                    continue
-                if value is None:
-                    value = None
-                elif isinstance(value, datetime) or isinstance(value, date):
-                    value = value.isoformat()
-                elif isinstance(value, Decimal):
-                    value = float(value)
-                elif isinstance(value, int):
-                    value = int(value)
-                elif isinstance(value, float):
-                    value = float(value)
-                row_dict[col.name] = value
-            json_data[table_name].append(row_dict)
-
-    return json_data
\ No newline at end of file
+    return {table_name: list(table_rows(table_obj, limit_per_table))
+            for table_name, table_obj in public_tables()}
+
+def iter_table_json(limit_per_table=None, batch_size=1000):
+    """
+    Same document as json.dumps(table_to_json()), produced piece by piece
+    so a full export never holds a whole table in memory.
+    """
+    yield "{"
+    for index, (table_name, table_obj) in enumerate(public_tables()):
+        yield ("," if index else "") + json.dumps(table_name) + ":["
+        batch = []
+        first = True
+        for row in table_rows(table_obj, limit_per_table, batch_size):
+            batch.append(json.dumps(row))
+            if len(batch) >= batch_size:
+                yield ("" if first else ",") + ",".join(batch)
+                first = False
+                batch = []
+        if batch:
+            yield ("" if first else ",") + ",".join(batch)
+        yield "]"
+    yield "}"
+
+def write_table_json(fp, limit_per_table=None, batch_size=1000):
+    for chunk in iter_table_json(limit_per_table, batch_size):
+        fp.write(chunk)
\ No newline at end of file
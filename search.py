@@ -0,0 +1,217 @@
+import re
+from sqlalchemy import text, case, or_, column, select, bindparam
+from sqlalchemy.exc import OperationalError
+from models import db, Vendors, Invoices
+from database.database_helpers import contains_pattern, LIKE_ESCAPE
+
+SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 100
+
+# FTS5 tables over the columns people search by, kept in sync by triggers.
+# They use the base tables as external content, so the text is not stored twice.
+FTS_TABLES = {
+    'vendors_fts': ('vendors', ('vendor_name', 'business_type', 'city')),
+    'invoices_fts': ('invoices', ('invoice_number', 'description')),
+}
+
+# bm25 column weights: a hit in the name or number counts most
+VENDOR_RANK = "bm25(vendors_fts, 10.0, 2.0, 1.0)"
+INVOICE_RANK = "bm25(invoices_fts, 10.0, 1.0)"
+
+_fts_ready = {}
+
+def _fts_ddl(fts_table, base_table, columns):
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{col}" for col in columns)
+    old_values = ", ".join(f"old.{col}" for col in columns)
+    delete_old = (f"INSERT INTO {fts_table}({fts_table}, rowid, {cols}) "
+                  f"VALUES ('delete', old.id, {old_values});")
+    insert_new = f"INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.id, {new_values});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+        f"{cols}, content='{base_table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {base_table} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {base_table} BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {cols} ON {base_table} "
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+
+def fts_available():
+    """
+    True when the database is SQLite and the FTS tables exist.
+    """
+    bind = db.session.get_bind()
+    key = str(bind.url)
+    if key not in _fts_ready:
+        if bind.dialect.name != 'sqlite':
+            _fts_ready[key] = False
+        else:
+            found = db.session.execute(text(
+                "SELECT count(*) FROM sqlite_master WHERE type = 'table' AND name IN ('vendors_fts', 'invoices_fts')"
+            )).scalar()
+            _fts_ready[key] = found == len(FTS_TABLES)
+    return _fts_ready[key]
+
+def ensure_search_index():
+    """
+    Create the FTS tables and triggers if they are missing, then rebuild them
+    from the base tables. Does nothing on databases other than SQLite, or when
+    SQLite was built without FTS5; search then falls back to LIKE.
+    """
+    bind = db.session.get_bind()
+    _fts_ready.pop(str(bind.url), None)
+    if bind.dialect.name != 'sqlite':
+        return False
+    try:
+        for fts_table, (base_table, columns) in FTS_TABLES.items():
+            for statement in _fts_ddl(fts_table, base_table, columns):
+                db.session.execute(text(statement))
+        db.session.commit()
+    except OperationalError:
+        db.session.rollback()
+        return False
+    rebuild_search_index()
+    return True
+
+def drop_insert_triggers():
+    """
+    Stop indexing inserted rows one at a time during a bulk load, then call
+    ensure_search_index() afterwards to put the triggers back and index
+    everything in one pass. pysqlite runs DDL outside its implicit transaction,
+    so the drop is committed at once and a rollback does not undo it: call
+    ensure_search_index() on failure too.
+    """
+    if not fts_available():
+        return False
+    for fts_table in FTS_TABLES:
+        db.session.execute(text(f"DROP TRIGGER IF EXISTS {fts_table}_ai"))
+    return True
+
+def rebuild_search_index():
+    # Re-reads every row of the base tables, e.g. after they were dropped and refilled
+    if not fts_available():
+        return
+    for fts_table in FTS_TABLES:
+        db.session.execute(text(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')"))
+    db.session.commit()
+
+def search_words(q):
+    return re.findall(r"\w+", q or "")
+
+def fts_query(q, column_name=None):
+    """
+    MATCH expression where every word must appear, each as a prefix,
+    e.g. 'blue log' -> '"blue"* "log"*'. None when q has no words.
+    With column_name, only that column of the FTS table is searched.
+    """
+    words = search_words(q)
+    if not words:
+        return None
+    match = " ".join(f'"{word}"*' for word in words)
+    return f"{column_name} : ({match})" if column_name else match
+
+def _match_ids(fts_table, match):
+    # unique=True so several of these subqueries can sit in one statement
+    return text(f"SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH :match") \
+        .bindparams(bindparam('match', match, unique=True)).columns(column('rowid'))
+
+def _like_terms(q):
+    return [contains_pattern(word) for word in search_words(q)]
+
+# --- Vendors ---
+def vendor_match_ids(q):
+    """
+    Subquery of vendor ids matching q, to use inside other queries.
+    """
+    match = fts_query(q)
+    if match is None:
+        return None
+    if fts_available():
+        return _match_ids('vendors_fts', match)
+    columns = (Vendors.vendor_name, Vendors.business_type, Vendors.city)
+    return select(Vendors.id).where(*[or_(*[col.ilike(term, escape=LIKE_ESCAPE) for col in columns]) for term in _like_terms(q)])
+
+def vendor_name_match_ids(q):
+    """
+    Like vendor_match_ids, but only the vendor name is searched.
+    """
+    match = fts_query(q, 'vendor_name')
+    if match is None:
+        return None
+    if fts_available():
+        return _match_ids('vendors_fts', match)
+    return select(Vendors.id).where(*[Vendors.vendor_name.ilike(term, escape=LIKE_ESCAPE) for term in _like_terms(q)])
+
+def search_vendors(q, limit=SEARCH_LIMIT):
+    """
+    Best matching vendors first: [{'id', 'vendor_name', 'business_type', 'city', 'score'}].
+    """
+    match = fts_query(q)
+    if match is None:
+        return []
+
+    if fts_available():
+        rows = db.session.execute(text(
+            f"SELECT v.id, v.vendor_name, v.business_type, v.city, {VENDOR_RANK} AS rank "
+            "FROM vendors_fts JOIN vendors v ON v.id = vendors_fts.rowid "
+            "WHERE vendors_fts MATCH :match ORDER BY rank LIMIT :limit"
+        ), {"match": match, "limit": limit}).all()
+        return [{"id": row.id, "vendor_name": row.vendor_name, "business_type": row.business_type,
+                 "city": row.city, "score": round(-row.rank, 3)} for row in rows]
+
+    # LIKE fallback: every word somewhere in the searched columns, name hits first
+    terms = _like_terms(q)
+    columns = (Vendors.vendor_name, Vendors.business_type, Vendors.city)
+    name_hits = sum(case((Vendors.vendor_name.ilike(term, escape=LIKE_ESCAPE), 1), else_=0) for term in terms)
+    rows = db.session.query(Vendors.id, Vendors.vendor_name, Vendors.business_type, Vendors.city,
+                            name_hits.label('rank')) \
+        .filter(*[or_(*[col.ilike(term, escape=LIKE_ESCAPE) for col in columns]) for term in terms]) \
+        .order_by(name_hits.desc(), Vendors.vendor_name) \
+        .limit(limit).all()
+    return [{"id": row.id, "vendor_name": row.vendor_name, "business_type": row.business_type,
+             "city": row.city, "score": float(row.rank)} for row in rows]
+
+# --- Invoices ---
+def invoice_match_ids(q):
+    """
+    Subquery of invoice ids whose number or description matches q.
+    """
+    match = fts_query(q)
+    if match is None:
+        return None
+    if fts_available():
+        return _match_ids('invoices_fts', match)
+    columns = (Invoices.invoice_number, Invoices.description)
+    return select(Invoices.id).where(*[or_(*[col.ilike(term, escape=LIKE_ESCAPE) for col in columns]) for term in _like_terms(q)])
+
+def search_invoices(q, limit=SEARCH_LIMIT):
+    """
+    Best matching invoices first, with the vendor name:
+    [{'id', 'invoice_number', 'date', 'vendor_name', 'amount', 'description', 'score'}].
+    """
+    match = fts_query(q)
+    if match is None:
+        return []
+
+    if fts_available():
+        rows = db.session.execute(text(
+            f"SELECT i.id, i.invoice_number, i.date, v.vendor_name, i.amount, i.description, {INVOICE_RANK} AS rank "
+            "FROM invoices_fts JOIN invoices i ON i.id = invoices_fts.rowid "
+            "JOIN vendors v ON v.id = i.vendor_id "
+            "WHERE invoices_fts MATCH :match ORDER BY rank LIMIT :limit"
+        ), {"match": match, "limit": limit}).all()
+        score = lambda row: round(-row.rank, 3)
+    else:
+        terms = _like_terms(q)
+        number_hits = sum(case((Invoices.invoice_number.ilike(term, escape=LIKE_ESCAPE), 1), else_=0) for term in terms)
+        rows = db.session.query(Invoices.id, Invoices.invoice_number, Invoices.date, Vendors.vendor_name,
+                                Invoices.amount, Invoices.description, number_hits.label('rank')) \
+            .join(Vendors, Invoices.vendor_id == Vendors.id) \
+            .filter(*[or_(Invoices.invoice_number.ilike(term, escape=LIKE_ESCAPE), Invoices.description.ilike(term, escape=LIKE_ESCAPE)) for term in terms]) \
+            .order_by(number_hits.desc(), Invoices.date.desc()) \
+            .limit(limit).all()
+        score = lambda row: float(row.rank)
+
+    return [{"id": row.id, "invoice_number": row.invoice_number, "date": str(row.date),
+             "vendor_name": row.vendor_name, "amount": float(row.amount),
+             "description": row.description, "score": score(row)} for row in rows]
\ No newline at end of file
@@ -0,0 +1,86 @@
+// Vendor suggestions under a text input, from /vendor/typeahead.
+// onSelect receives {id, vendor_name} when a suggestion is clicked or chosen with Enter.
+function vendorTypeahead(input, onSelect) {
+    const url = input.dataset.typeaheadUrl || '/vendor/typeahead';
+    const list = document.createElement('ul');
+    list.className = 'hidden absolute z-10 mt-1 w-full bg-white border border-gray-300 rounded shadow max-h-60 overflow-auto';
+    input.parentNode.classList.add('relative');
+    input.after(list);
+    input.setAttribute('autocomplete', 'off');
+
+    let vendors = [];
+    let active = -1;
+    let timer = null;
+    let controller = null;
+
+    function close() {
+        list.classList.add('hidden');
+        active = -1;
+    }
+
+    function highlight(index) {
+        active = index;
+        Array.from(list.children).forEach((item, i) => item.classList.toggle('bg-gray-100', i === active));
+    }
+
+    function choose(vendor) {
+        close();
+        onSelect(vendor);
+    }
+
+    function render() {
+        list.innerHTML = '';
+        vendors.forEach(vendor => {
+            const item = document.createElement('li');
+            item.textContent = vendor.vendor_name;
+            item.className = 'px-3 py-1 cursor-pointer hover:bg-gray-100';
+            // mousedown fires before the input loses focus
+            item.addEventListener('mousedown', event => {
+                event.preventDefault();
+                choose(vendor);
+            });
+            list.appendChild(item);
+        });
+        list.classList.toggle('hidden', vendors.length === 0);
+        highlight(vendors.length ? 0 : -1);
+    }
+
+    input.addEventListener('input', () => {
+        clearTimeout(timer);
+        const q = input.value.trim();
+        if (!q) {
+            vendors = [];
+            close();
+            return;
+        }
+        timer = setTimeout(() => {
+            if (controller) controller.abort();
+            controller = new AbortController();
+            fetch(url + '?q=' + encodeURIComponent(q), { signal: controller.signal })
+                .then(response => response.json())
+                .then(data => {
+                    vendors = data.vendors || [];
+                    render();
+                })
+                .catch(() => {});
+        }, 120);
+    });
+
+    input.addEventListener('keydown', event => {
+        if (list.classList.contains('hidden')) return;
+        if (event.key === 'ArrowDown') {
+            event.preventDefault();
+            highlight(Math.min(active + 1, vendors.length - 1));
+        } else if (event.key === 'ArrowUp') {
+            event.preventDefault();
+            highlight(Math.max(active - 1, 0));
+        } else if (event.key === 'Enter' && active >= 0) {
+            event.preventDefault();
+            choose(vendors[active]);
+        } else if (event.key === 'Escape') {
+            close();
+        }
+    });
+
+    input.addEventListener('blur', close);
+}
\ No newline at end of file
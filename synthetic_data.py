@@ -0,0 +1,237 @@
+import calendar
+import math
+import random
+import re
+import time
+from datetime import date, timedelta
+from itertools import accumulate
+from sqlalchemy import func, insert
+from werkzeug.security import generate_password_hash
+from models import db, Users, Vendors, Invoices
+from search import drop_insert_triggers, ensure_search_index
+
+BATCH_SIZE = 10000
+
+FIRST_NAMES = ["James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David",
+               "Elizabeth", "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas",
+               "Sarah", "Charles", "Karen", "Omar", "Aisha", "Wei", "Mei", "Raj", "Priya", "Lucas", "Sofia"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Martinez",
+              "Lopez", "Wilson", "Anderson", "Taylor", "Thomas", "Moore", "Martin", "Lee", "Thompson",
+              "White", "Harris", "Clark", "Lewis", "Walker", "Hall", "Young", "King", "Haddad", "Chen"]
+
+NAME_PREFIXES = ["Global", "Northern", "Pacific", "Atlantic", "Summit", "Pioneer", "Evergreen", "Silver",
+                 "Blue", "Green", "Red", "Golden", "United", "Prime", "Apex", "Metro", "Coastal", "Royal",
+                 "Bright", "Rapid", "Alpine", "Urban", "Liberty", "Crown", "Horizon", "Keystone"]
+NAME_CORES = ["Supplies", "Logistics", "Systems", "Foods", "Steel", "Textiles", "Electric", "Paper",
+              "Analytics", "Motors", "Chemicals", "Builders", "Networks", "Packaging", "Pharma", "Energy",
+              "Hardware", "Furniture", "Printing", "Security", "Consulting", "Water", "Glass", "Tools"]
+NAME_SUFFIXES = ["Inc.", "Ltd.", "LLC", "Corp.", "GmbH", "Co.", "Group", "Partners", ""]
+
+BUSINESS_TYPES = ["Wholesale", "IT Services", "Construction", "Transportation", "Manufacturing",
+                  "Consulting", "Retail", "Utilities", "Food Services", "Office Supplies"]
+
+# (country, typical tax rate, cities with postal code formats)
+COUNTRIES = [
+    ("Canada", 0.13, [("Toronto", "M5H {n}A{n}"), ("Ottawa", "K1P {n}G{n}"), ("Vancouver", "V6B {n}K{n}")]),
+    ("USA", 0.07, [("New York", "100{n}{n}"), ("Chicago", "606{n}{n}"), ("Austin", "787{n}{n}")]),
+    ("UK", 0.20, [("London", "SW1A {n}AA"), ("Manchester", "M{n} {n}AE")]),
+    ("Germany", 0.19, [("Berlin", "101{n}{n}"), ("Munich", "803{n}{n}")]),
+    ("France", 0.20, [("Paris", "750{n}{n}"), ("Lyon", "690{n}{n}")]),
+]
+# Most vendors are domestic
+COUNTRY_WEIGHTS = [0.45, 0.30, 0.10, 0.08, 0.07]
+
+# Invoice volume by month (Jan..Dec) and weekday (Mon..Sun)
+MONTH_WEIGHTS = [0.85, 0.85, 1.10, 0.95, 0.95, 1.05, 0.80, 0.75, 1.05, 1.00, 1.10, 1.45]
+WEEKDAY_WEIGHTS = [1.2, 1.1, 1.1, 1.1, 1.0, 0.25, 0.15]
+
+DESCRIPTIONS = ["Monthly service fee", "Office supplies", "Equipment rental", "Consulting hours",
+                "Freight charges", "Raw materials", "Maintenance contract", "Software licenses",
+                "Catering", "Repairs", "Cleaning services", "Hardware purchase"]
+
+def zipf_weights(count, exponent=1.1):
+    # Popularity by rank: a few vendors get most of the invoices
+    return [1 / (rank ** exponent) for rank in range(1, count + 1)]
+
+def day_weights(start_date, end_date, growth=0.15):
+    """
+    Every day in the range with a weight from month and weekday seasonality,
+    plus a yearly growth trend so recent periods are busier.
+    """
+    days = []
+    weights = []
+    total_days = (end_date - start_date).days + 1
+    for offset in range(total_days):
+        day = start_date + timedelta(days=offset)
+        trend = (1 + growth) ** (offset / 365)
+        days.append(day)
+        weights.append(MONTH_WEIGHTS[day.month - 1] * WEEKDAY_WEIGHTS[day.weekday()] * trend)
+    return days, weights
+
+def _postal_code(rng, pattern):
+    return re.sub(r"\{n\}", lambda _: str(rng.randint(0, 9)), pattern)
+
+class SyntheticDataGenerator:
+    """
+    Reproducible bulk data: the same seed on the same starting database gives
+    the same rows. Everything is written with Core executemany inserts inside
+    one transaction.
+    """
+    def __init__(self, seed=42, batch_size=BATCH_SIZE, password="password", log=print):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.password = password
+        self.log = log
+        self.timings = {}
+
+    def _insert(self, table_name, model, rows):
+        """
+        Insert rows (any iterable of dicts) in batches; returns the number inserted.
+        """
+        # Plain table inserts skip the ORM's per-row bookkeeping
+        table_insert = insert(model.__table__)
+        started = time.perf_counter()
+        count = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                db.session.execute(table_insert, batch)
+                count += len(batch)
+                batch = []
+                if count % (self.batch_size * 10) == 0:
+                    elapsed = time.perf_counter() - started
+                    self.log(f"  {table_name}: {count:,} rows, {count / elapsed:,.0f} rows/s")
+        if batch:
+            db.session.execute(table_insert, batch)
+            count += len(batch)
+
+        elapsed = time.perf_counter() - started
+        self.timings[table_name] = (count, elapsed)
+        self.log(f"{table_name}: {count:,} rows in {elapsed:.2f}s ({count / max(elapsed, 1e-9):,.0f} rows/s)")
+        return count
+
+    def _next_id(self, model):
+        return (db.session.query(func.max(model.id)).scalar() or 0) + 1
+
+    # --- Users ---
+    def user_rows(self, count, first_id):
+        # One hash shared by every generated user; hashing is deliberately slow
+        password_hash = generate_password_hash(self.password)
+        rng = self.rng
+        for number in range(first_id, first_id + count):
+            first_name = rng.choice(FIRST_NAMES)
+            last_name = rng.choice(LAST_NAMES)
+            yield {
+                'username': f"load{number}",
+                'first_name': first_name,
+                'last_name': last_name,
+                'email': f"{first_name}.{last_name}.{number}@example.com".lower(),
+                'password_hash': password_hash,
+            }
+
+    # --- Vendors ---
+    def vendor_rows(self, count, first_id, usernames):
+        rng = self.rng
+        for number in range(first_id, first_id + count):
+            country, _, cities = rng.choices(COUNTRIES, weights=COUNTRY_WEIGHTS)[0]
+            city, postal_pattern = rng.choice(cities)
+            suffix = rng.choice(NAME_SUFFIXES)
+            name = f"{rng.choice(NAME_PREFIXES)} {rng.choice(NAME_CORES)} {suffix}".strip()
+            yield {
+                # The number keeps names unique once the combinations run out
+                'vendor_name': f"{name} #{number}",
+                'business_type': rng.choice(BUSINESS_TYPES),
+                'tax_id': f"TX{rng.randrange(10 ** 8):08d}",
+                'country': country,
+                'city': city,
+                'postal_code': _postal_code(rng, postal_pattern),
+                'created_by': rng.choice(usernames),
+            }
+
+    # --- Invoices ---
+    def vendor_profiles(self):
+        """
+        Per vendor: (id, popularity weight, log-normal amount median, tax rate).
+        Vendors are ranked in a shuffled order so popularity is not tied to age.
+        """
+        rates = {country: rate for country, rate, _ in COUNTRIES}
+        vendors = db.session.query(Vendors.id, Vendors.country).order_by(Vendors.id).all()
+        self.rng.shuffle(vendors)
+        weights = zipf_weights(len(vendors))
+        profiles = []
+        for (vendor_id, country), weight in zip(vendors, weights):
+            median = math.log(self.rng.choice([150, 400, 1200, 3500, 9000]))
+            profiles.append((vendor_id, weight, median, rates.get(country, 0.1)))
+        return profiles
+
+    def invoice_rows(self, count, first_id, user_ids, start_date, end_date):
+        rng = self.rng
+        profiles = self.vendor_profiles()
+        cum_vendor_weights = list(accumulate(weight for _, weight, _, _ in profiles))
+        days, weights = day_weights(start_date, end_date)
+        cum_day_weights = list(accumulate(weights))
+        # Some users enter far more invoices than others
+        cum_user_weights = list(accumulate(zipf_weights(len(user_ids), exponent=0.8)))
+
+        number = first_id
+        remaining = count
+        while remaining:
+            size = min(self.batch_size, remaining)
+            vendors = rng.choices(profiles, cum_weights=cum_vendor_weights, k=size)
+            dates = rng.choices(days, cum_weights=cum_day_weights, k=size)
+            users = rng.choices(user_ids, cum_weights=cum_user_weights, k=size)
+            for (vendor_id, _, median, tax_rate), invoice_date, user_id in zip(vendors, dates, users):
+                amount = round(min(math.exp(rng.gauss(median, 0.7)), 999999.0), 2)
+                # About 5% are tax exempt; the rest vary a little around the country rate
+                if rng.random() < 0.05:
+                    tax = None
+                else:
+                    tax = round(amount * tax_rate * rng.uniform(0.95, 1.05), 2)
+                yield {
+                    'invoice_number': f"GEN-{number:09d}",
+                    'date': invoice_date,
+                    'vendor_id': vendor_id,
+                    'user_id': user_id,
+                    'amount': amount,
+                    'tax': tax,
+                    'description': f"{rng.choice(DESCRIPTIONS)} {calendar.month_abbr[invoice_date.month]} {invoice_date.year}",
+                }
+                number += 1
+            remaining -= size
+
+    def generate(self, users=0, vendors=0, invoices=0, years=3, end_date=None):
+        """
+        Add the requested numbers of users, vendors and invoices, then commit once.
+        Invoices go to existing and new users and vendors alike.
+        Derived data (rollup, search index, caches) is left to the caller.
+        """
+        end_date = end_date or date.today()
+        start_date = end_date - timedelta(days=365 * years - 1)
+        started = time.perf_counter()
+        try:
+            drop_insert_triggers()
+            if users:
+                self._insert('users', Users, self.user_rows(users, self._next_id(Users)))
+            if vendors:
+                usernames = [name for (name,) in db.session.query(Users.username).limit(1000)]
+                self._insert('vendors', Vendors, self.vendor_rows(vendors, self._next_id(Vendors), usernames))
+            if invoices:
+                user_ids = [user_id for (user_id,) in db.session.query(Users.id).order_by(Users.id)]
+                if not user_ids or not db.session.query(Vendors.id).first():
+                    raise ValueError("Invoices need at least one user and one vendor.")
+                self._insert('invoices', Invoices,
+                             self.invoice_rows(invoices, self._next_id(Invoices), user_ids, start_date, end_date))
+            commit_started = time.perf_counter()
+            db.session.commit()
+            self.timings['commit'] = (0, time.perf_counter() - commit_started)
+        except Exception:
+            db.session.rollback()
+            # The trigger drop is not undone by the rollback
+            ensure_search_index()
+            raise
+
+        total = sum(count for count, _ in self.timings.values())
+        elapsed = time.perf_counter() - started
+        self.log(f"Total: {total:,} rows in {elapsed:.2f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+        return self.timings
\ No newline at end of file
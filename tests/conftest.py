@@ -0,0 +1,26 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Test modules import the app's top-level modules directly
+sys.path.insert(0, ROOT)
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory):
+    # app.py reads DATABASE_URL when it is imported
+    path = tmp_path_factory.mktemp("db") / "test.db"
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    app_module = importlib.import_module("app")
+    app_module.app.config.update(SESSION_COOKIE_SECURE=False, WTF_CSRF_ENABLED=False)
+    with app_module.app.app_context():
+        app_module.init_database()
+    return app_module.app
+
+@pytest.fixture
+def guest_client(app):
+    client = app.test_client()
+    client.get("/guest_login")
+    return client
\ No newline at end of file
@@ -0,0 +1,11 @@
+import pytest
+
+@pytest.mark.parametrize("name", ["%", "_"])
+def test_vendor_name_filter_treats_wildcards_literally(guest_client, name):
+    response = guest_client.get("/api/v1/vendors/", query_string={"name": name})
+    assert response.status_code == 200
+    assert response.get_json() == []
+
+def test_vendor_name_filter_matches_substrings(guest_client):
+    response = guest_client.get("/api/v1/vendors/", query_string={"name": "supplies"})
+    assert [vendor["vendor_name"] for vendor in response.get_json()] == ["Global Supplies Inc."]
\ No newline at end of file
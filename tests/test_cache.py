@@ -0,0 +1,88 @@
+import time
+
+import pytest
+
+from models import db, Invoices, Users
+from cache import TTLCache, SnapshotCache, data_version, user_cache
+
+# --- TTLCache ---
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2, max_age=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    assert cache.stats()["evictions"] == 1
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    cache = TTLCache(max_entries=2, max_age=10)
+    cache.put("a", 1)
+    later = time.monotonic() + 11
+    monkeypatch.setattr(time, "monotonic", lambda: later)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+# --- Logged-in users ---
+@pytest.fixture
+def jdoe_client(app):
+    client = app.test_client()
+    client.post("/login", data={"username": "jdoe", "password": "password"})
+    with app.app_context():
+        user_id = Users.query.filter_by(username="jdoe").one().id
+    yield client, user_id
+    with app.app_context():
+        Users.query.filter_by(id=user_id).update({Users.first_name: "John"})
+        db.session.commit()
+    user_cache.invalidate(user_id)
+
+def test_user_cache_is_dropped_when_the_user_is_edited(jdoe_client):
+    client, user_id = jdoe_client
+    client.get("/dashboard")
+    assert user_cache.get(user_id)["first_name"] == "John"
+
+    client.post("/user/edit", data={"username": "jdoe", "first_name": "Johnny",
+                                     "last_name": "Doe", "email": "jdoe@example.com"})
+    assert user_cache.get(user_id) is None
+
+    client.get("/dashboard")
+    assert user_cache.get(user_id)["first_name"] == "Johnny"
+
+def test_user_cache_is_dropped_when_the_password_changes(jdoe_client):
+    client, user_id = jdoe_client
+    client.get("/dashboard")
+    assert user_cache.get(user_id) is not None
+
+    client.post("/user/change_password", data={"old_password": "password", "password": "password"})
+    assert user_cache.get(user_id) is None
+
+# --- Chatbot snapshot ---
+def test_data_version_moves_only_on_committed_writes(app):
+    with app.app_context():
+        before = data_version()
+        invoice = Invoices.query.first()
+        invoice.description = "changed, then rolled back"
+        db.session.flush()
+        db.session.rollback()
+        assert data_version() == before
+
+        Invoices.query.filter_by(id=invoice.id).update({Invoices.description: invoice.description})
+        db.session.commit()
+        assert data_version() == before + 1
+
+def test_snapshot_is_rebuilt_after_a_write(app):
+    snapshots = SnapshotCache(max_age=600)
+    with app.app_context():
+        first = snapshots.get()
+        assert snapshots.get() is first
+
+        invoice = Invoices.query.order_by(Invoices.id).first()
+        original = invoice.description
+        invoice.description = "snapshot marker"
+        db.session.commit()
+        try:
+            assert "snapshot marker" in snapshots.get()
+            assert snapshots.stats()["misses"] == 2
+        finally:
+            invoice.description = original
+            db.session.commit()
\ No newline at end of file
@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, ChatMessages, ChatSummaries
+from chat import (DISPLAY_MESSAGES, add_message, history_for_prompt, new_conversation_key,
+                  prune_idle_conversations, save_summary)
+
+@pytest.fixture
+def ctx(app):
+    with app.app_context():
+        yield
+        db.session.rollback()
+
+def test_save_summary_upserts_and_keeps_the_longer_summary(ctx):
+    key = new_conversation_key()
+    save_summary(key, "first", 10)
+    save_summary(key, "second", 20)
+    save_summary(key, "stale", 15)  # a slower request that folded fewer messages
+    db.session.commit()
+
+    row = db.session.get(ChatSummaries, key)
+    assert (row.summary, row.summarized_through) == ("second", 20)
+
+def test_folded_messages_beyond_the_page_are_deleted(ctx):
+    key = new_conversation_key()
+    for number in range(DISPLAY_MESSAGES + 20):
+        add_message(key, "user" if number % 2 == 0 else "assistant", f"message {number} " + "x" * 400)
+
+    summary, recent = history_for_prompt(key, token_budget=500)
+
+    assert summary
+    assert recent[-1]["content"].startswith(f"message {DISPLAY_MESSAGES + 19} ")
+    kept = ChatMessages.query.filter_by(conversation_key=key).order_by(ChatMessages.id).all()
+    assert len(kept) == DISPLAY_MESSAGES
+    assert kept[0].content.startswith("message 20 ")
+    # Only messages already in the summary were deleted
+    assert db.session.get(ChatSummaries, key).summarized_through >= kept[0].id - 1
+
+def test_prune_idle_conversations(ctx):
+    idle, active = new_conversation_key(), new_conversation_key()
+    add_message(idle, "user", "old question")
+    add_message(active, "user", "new question")
+    save_summary(idle, "User: old question", 1)
+    ChatMessages.query.filter_by(conversation_key=idle) \
+        .update({ChatMessages.created_at: datetime.utcnow() - timedelta(days=45)})
+    db.session.commit()
+
+    assert prune_idle_conversations(30) >= 1
+    assert ChatMessages.query.filter_by(conversation_key=idle).count() == 0
+    assert db.session.get(ChatSummaries, idle) is None
+    assert ChatMessages.query.filter_by(conversation_key=active).count() == 1
\ No newline at end of file
@@ -0,0 +1,20 @@
+import csv
+import json
+
+def test_export_invoices_csv_to_file(app, tmp_path):
+    output = tmp_path / "invoices.csv"
+    result = app.test_cli_runner().invoke(args=["export-invoices", "--format", "csv", "--output", str(output)])
+
+    assert result.exit_code == 0, result.output
+    with open(output, encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert rows
+    assert {"invoice_number", "vendor_name", "amount"} <= set(rows[0])
+
+def test_export_invoices_jsonl_to_stdout(app):
+    result = app.test_cli_runner().invoke(args=["export-invoices", "--format", "jsonl"])
+
+    assert result.exit_code == 0, result.output
+    lines = result.output.splitlines()
+    assert lines
+    assert "invoice_number" in json.loads(lines[0])
\ No newline at end of file
@@ -0,0 +1,26 @@
+import sys
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from models import db
+
+def test_failed_query_is_not_counted_or_left_on_the_connection(app, monkeypatch):
+    monkeypatch.setenv("SQL_INSTRUMENTATION", "1")
+    instrumented = sys.modules["app"].create_app(database_url=app.config["SQLALCHEMY_DATABASE_URI"])
+    infos = []
+
+    @instrumented.route("/fails-then-works")
+    def fails_then_works():
+        infos.append(db.session.connection().info)
+        try:
+            db.session.execute(text("SELECT * FROM no_such_table"))
+        except OperationalError:
+            db.session.rollback()
+        db.session.execute(text("SELECT 1"))
+        infos.append(db.session.connection().info)
+        return "ok"
+
+    response = instrumented.test_client().get("/fails-then-works")
+    assert response.headers["X-Query-Count"] == "1"
+    assert all(not info for info in infos)
\ No newline at end of file
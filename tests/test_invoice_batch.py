@@ -0,0 +1,61 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import false, update
+
+import database.database_helpers as helpers
+from models import db, Invoices, Users, Vendors, VendorMonthlySpend
+from database import write_invoice_batch
+
+@pytest.fixture(params=["on_conflict", "portable"])
+def ctx(request, app, monkeypatch):
+    # "portable" runs the fallback used on databases without ON CONFLICT
+    with app.app_context():
+        if request.param == "portable":
+            monkeypatch.setattr(helpers, "dialect_insert", lambda model: None)
+            # pysqlite only opens a transaction before DML, and a SAVEPOINT outside
+            # one commits on release; start it so the rollback below undoes the test
+            db.session.execute(update(Users).where(false()).values(username=Users.username))
+        yield
+        db.session.rollback()
+
+def ids():
+    user_id = db.session.query(Users.id).filter_by(username="guest").scalar()
+    first, second = [vendor_id for (vendor_id,) in db.session.query(Vendors.id).order_by(Vendors.id).limit(2)]
+    return user_id, first, second
+
+def invoice(number, vendor_id, user_id, amount, tax=None, day=date(2032, 6, 15)):
+    return {"invoice_number": number, "date": day, "vendor_id": vendor_id, "user_id": user_id,
+            "amount": Decimal(amount), "tax": Decimal(tax) if tax else None, "description": None}
+
+def rollup(vendor_id, month=date(2032, 6, 1)):
+    row = db.session.get(VendorMonthlySpend, (vendor_id, month))
+    db.session.expire_all()
+    return (row.invoice_count, row.amount, row.tax) if row else (0, 0, 0)
+
+def test_skip_mode_keeps_existing_invoices(ctx):
+    user_id, first, _ = ids()
+    outcomes = write_invoice_batch([invoice("BATCH-1", first, user_id, "100.00", "13.00"),
+                                    invoice("BATCH-2", first, user_id, "50.00")])
+    assert outcomes == {"BATCH-1": "created", "BATCH-2": "created"}
+    assert rollup(first) == (2, Decimal("150.00"), Decimal("13.00"))
+
+    outcomes = write_invoice_batch([invoice("BATCH-1", first, user_id, "999.00"),
+                                    invoice("BATCH-3", first, user_id, "1.00")])
+    assert outcomes == {"BATCH-1": "skipped", "BATCH-3": "created"}
+    assert Invoices.query.filter_by(invoice_number="BATCH-1").one().amount == Decimal("100.00")
+    assert rollup(first) == (3, Decimal("151.00"), Decimal("13.00"))
+
+def test_upsert_mode_moves_rollup_totals(ctx):
+    user_id, first, second = ids()
+    write_invoice_batch([invoice("BATCH-1", first, user_id, "100.00", "13.00"),
+                         invoice("BATCH-2", first, user_id, "50.00")])
+
+    outcomes = write_invoice_batch([invoice("BATCH-1", second, user_id, "80.00", "8.00"),
+                                    invoice("BATCH-2", first, user_id, "50.00"),
+                                    invoice("BATCH-3", second, user_id, "5.00")], mode="upsert")
+    assert outcomes == {"BATCH-1": "updated", "BATCH-2": "unchanged", "BATCH-3": "created"}
+    assert Invoices.query.filter_by(invoice_number="BATCH-1").one().vendor_id == second
+    assert rollup(first) == (1, Decimal("50.00"), Decimal("0.00"))
+    assert rollup(second) == (2, Decimal("85.00"), Decimal("8.00"))
\ No newline at end of file
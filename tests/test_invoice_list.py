@@ -0,0 +1,64 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from models import db, Invoices, Users, Vendors
+from database import get_invoice_page
+from database.database_helpers import decode_cursor, encode_cursor
+
+@pytest.fixture
+def keyset_invoices(app):
+    # Seven invoices sharing two amounts and two dates, so pages split runs of equal sort values
+    with app.app_context():
+        user_id = db.session.query(Users.id).filter_by(username="guest").scalar()
+        vendor_id = db.session.query(Vendors.id).order_by(Vendors.id).first()[0]
+        for number in range(7):
+            db.session.add(Invoices(invoice_number=f"KEYSET-{number}", vendor_id=vendor_id, user_id=user_id,
+                                    date=date(2034, 2, 1 + number % 2), amount=Decimal(100 + 50 * (number % 2)),
+                                    tax=Decimal("1.00") if number < 3 else None))
+        db.session.flush()
+        yield
+        db.session.rollback()
+
+def walk(sort, direction, limit=3):
+    # Follow next cursors from the first page to the last
+    numbers = []
+    cursor = None
+    while True:
+        rows, cursor = get_invoice_page(search="keyset", sort=sort, direction=direction, cursor=cursor, limit=limit)
+        numbers.extend(row.invoice_number for row in rows)
+        if cursor is None:
+            return numbers
+
+@pytest.mark.parametrize("sort", ["date", "amount", "tax", "invoice_number", "vendor"])
+@pytest.mark.parametrize("direction", ["asc", "desc"])
+def test_pages_cover_every_row_once_in_order(keyset_invoices, sort, direction):
+    rows, cursor = get_invoice_page(search="keyset", sort=sort, direction=direction, limit=100)
+    assert cursor is None
+    expected = [row.invoice_number for row in rows]
+    keys = [(row.sort_key, row.id) for row in rows]
+
+    assert len(expected) == 7
+    assert keys == sorted(keys, reverse=(direction == "desc"))
+    assert walk(sort, direction) == expected
+    assert walk(sort, direction, limit=1) == expected
+
+def test_last_full_page_has_no_next_cursor(keyset_invoices):
+    rows, cursor = get_invoice_page(search="keyset", limit=7)
+    assert len(rows) == 7
+    assert cursor is None
+
+@pytest.mark.parametrize("sort, value", [
+    ("date", date(2034, 2, 1)),
+    ("amount", Decimal("150.00")),
+    ("tax", Decimal("0")),
+    ("invoice_number", "KEYSET-3"),
+])
+def test_cursor_round_trip(sort, value):
+    assert decode_cursor(encode_cursor(value, 42), sort) == (value, 42)
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "W10=", "WyJ4IiwgInkiXQ=="])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, "date")
\ No newline at end of file
@@ -0,0 +1,32 @@
+import threading
+import time
+
+from jobs import PdfParseQueue
+
+def slow_square(value):
+    time.sleep(0.05)
+    return value * value
+
+def test_batch_map_leaves_room_for_interactive_parses():
+    queue = PdfParseQueue(workers=2, max_pending=4)
+    results = []
+    peak = 0
+    batch = threading.Thread(target=lambda: results.extend(queue.map(slow_square, range(20))))
+    batch.start()
+    try:
+        job_id = None
+        while batch.is_alive():
+            pending = queue.stats()["pending"]
+            peak = max(peak, pending)
+            if job_id is None and pending:
+                # Raises QueueFull if the batch had taken every slot
+                job_id = queue.submit(b"not a pdf", owner=1)
+            time.sleep(0.005)
+        batch.join()
+    finally:
+        queue._discard(queue._executor)
+
+    assert results == [value * value for value in range(20)]
+    assert job_id is not None
+    assert peak <= 3  # two batch items plus the interactive job
+    assert queue.stats()["pending"] == 0
\ No newline at end of file
@@ -0,0 +1,99 @@
+import io
+
+import pytest
+
+from utilities import extract_invoice_fields, extract_text_fields, parse_amount, parse_date
+
+class FakePage:
+    def __init__(self, text, reads):
+        self.text = text
+        self.reads = reads
+
+    def extract_text(self):
+        self.reads.append(self.text)
+        return self.text
+
+def pages(*texts):
+    reads = []
+    return [FakePage(text, reads) for text in texts], reads
+
+INVOICE_TEXT = """Invoice No. INV-2041/B
+Date: 7 March 2024
+Vendor: BlueSky Logistics
+Amount Due: USD 1,234.50
+Tax: $160.49
+Description: Freight for March"""
+
+def test_every_field_from_one_page():
+    fields = extract_text_fields(pages(INVOICE_TEXT)[0])
+    assert fields == {
+        "invoice_number": "INV-2041/B",
+        "date": "7 March 2024",
+        "amount": "1,234.50",
+        "tax": "160.49",
+        "description": "Freight for March",
+        "vendor_name": "BlueSky Logistics",
+    }
+
+def test_first_match_wins_across_pages():
+    fields = extract_text_fields(pages("Invoice Number: A-1\nAmount: 10.00", "Invoice Number: B-2\nTax: 1.30")[0])
+    assert fields["invoice_number"] == "A-1"
+    assert fields["amount"] == "10.00"
+    assert fields["tax"] == "1.30"
+    assert fields["date"] is None
+
+def test_stops_reading_once_every_field_is_found():
+    document, reads = pages(INVOICE_TEXT, "Clause 1: terms", "Clause 2: more terms")
+    extract_text_fields(document)
+    assert reads == [INVOICE_TEXT]
+
+def test_reads_at_most_max_pages():
+    document, reads = pages(*["Clause: terms"] * 10, "Invoice Number: LATE-1")
+    fields = extract_text_fields(document, max_pages=5)
+    assert len(reads) == 5
+    assert fields["invoice_number"] is None
+
+@pytest.mark.parametrize("value, expected", [
+    ("2024-03-07", "03/07/2024"),
+    ("03/07/2024", "03/07/2024"),
+    ("25/12/2024", "12/25/2024"),
+    ("07.03.2024", "03/07/2024"),
+    ("March 7, 2024", "03/07/2024"),
+    ("7 Mar. 2024", "03/07/2024"),
+    ("not a date", None),
+])
+def test_parse_date(value, expected):
+    assert parse_date(value) == expected
+
+@pytest.mark.parametrize("value, expected", [
+    ("$1,234.50", 1234.5),
+    ("1.234,50", 1234.5),
+    ("1,234", 1234.0),
+    ("12,5", 12.5),
+    ("1.234.567", 1234567.0),
+    ("n/a", None),
+])
+def test_parse_amount(value, expected):
+    assert parse_amount(value) == expected
+
+def test_extract_invoice_fields_from_a_pdf_without_form_fields():
+    pytest.importorskip("reportlab", reason="reportlab comes from benchmarks/requirements.txt")
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    y = 780
+    for line in INVOICE_TEXT.splitlines():
+        pdf.drawString(50, y, line)
+        y -= 20
+    pdf.showPage()
+    pdf.save()
+
+    assert extract_invoice_fields(buffer.getvalue()) == {
+        "invoice_number": "INV-2041/B",
+        "date": "03/07/2024",
+        "amount": 1234.5,
+        "tax": 160.49,
+        "description": "Freight for March",
+        "vendor_name": "BlueSky Logistics",
+    }
\ No newline at end of file
@@ -0,0 +1,63 @@
+from datetime import date
+
+import pytest
+
+from models import db, Invoices, Vendors, VendorMonthlySpend
+from database import apply_invoice_to_rollup, get_vendor_spend, rebuild_vendor_rollup
+
+def rollup_rows():
+    # Rows left at zero by removals are equivalent to missing rows
+    rows = db.session.query(VendorMonthlySpend.vendor_id, VendorMonthlySpend.month,
+                            VendorMonthlySpend.invoice_count, VendorMonthlySpend.amount,
+                            VendorMonthlySpend.tax)
+    return {(row.vendor_id, row.month): (row.invoice_count, row.amount, row.tax)
+            for row in rows if row.invoice_count}
+
+def test_rollup_matches_rebuild_after_add_edit_and_batch(app, guest_client):
+    with app.app_context():
+        first, second = [vendor_id for (vendor_id,) in db.session.query(Vendors.id).order_by(Vendors.id).limit(2)]
+
+    response = guest_client.post("/invoice/add", data={
+        "invoice_number": "ROLLUP-1", "date": "2031-03-14", "vendor_id": first,
+        "amount": "120.50", "tax": "15.67", "description": "rollup test"})
+    assert response.status_code == 302
+
+    with app.app_context():
+        invoice_id = Invoices.query.filter_by(invoice_number="ROLLUP-1").one().id
+    response = guest_client.post(f"/invoice/edit/{invoice_id}", data={
+        "invoice_number": "ROLLUP-1", "date": "2031-04-02", "vendor_id": second,
+        "amount": "99.99", "tax": "", "description": "moved to another vendor and month"})
+    assert response.status_code == 200
+
+    response = guest_client.post("/api/v1/invoices/batch", json={"mode": "upsert", "invoices": [
+        {"invoice_number": "ROLLUP-2", "date": "2031-04-20", "vendor_id": second, "amount": 10, "tax": 1},
+        {"invoice_number": "ROLLUP-3", "date": "2031-05-01", "vendor_id": first, "amount": 20},
+        {"invoice_number": "ROLLUP-1", "date": "2031-03-31", "vendor_id": first, "amount": 5, "tax": 0.5},
+    ]})
+    assert response.get_json()["summary"] == {"created": 2, "updated": 1, "unchanged": 0, "skipped": 0, "invalid": 0}
+
+    with app.app_context():
+        incremental = rollup_rows()
+        rebuild_vendor_rollup()
+        assert incremental == rollup_rows()
+
+def test_removal_does_not_create_rollup_rows(app):
+    with app.app_context():
+        vendor_id = db.session.query(Vendors.id).order_by(Vendors.id).first()[0]
+        apply_invoice_to_rollup(vendor_id, date(1999, 1, 5), 10, 1, sign=-1)
+        assert db.session.get(VendorMonthlySpend, (vendor_id, date(1999, 1, 1))) is None
+        db.session.rollback()
+
+@pytest.mark.parametrize("bucket", [None, "month"])
+def test_vendor_spend_from_rollup_matches_invoices(app, monkeypatch, bucket):
+    import database.database_helpers as helpers
+
+    with app.app_context():
+        vendor_ids = [vendor_id for (vendor_id,) in db.session.query(Vendors.id)]
+        start, end = date(2000, 1, 1), date(2040, 12, 31)
+        from_rollup = get_vendor_spend(vendor_ids, start, end, bucket)
+        monkeypatch.setattr(helpers, "rollup_covers", lambda start_date, end_date: False)
+        from_invoices = get_vendor_spend(vendor_ids, start, end, bucket)
+
+    assert from_rollup
+    assert from_rollup == from_invoices
\ No newline at end of file
@@ -0,0 +1,70 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from models import db, Invoices, Users, Vendors
+from database import get_invoice_page
+from search import invoice_match_ids
+
+@pytest.fixture
+def ctx(app):
+    with app.app_context():
+        yield
+        db.session.rollback()
+
+def add_invoice(number, vendor, description=None):
+    user_id = db.session.query(Users.id).filter_by(username="guest").scalar()
+    invoice = Invoices(invoice_number=number, date=date(2033, 1, 10), vendor_id=vendor.id,
+                       user_id=user_id, amount=10, description=description)
+    db.session.add(invoice)
+    db.session.flush()
+    return invoice
+
+def indexed(q):
+    return set(db.session.execute(select(invoice_match_ids(q).subquery())).scalars())
+
+def listed(q):
+    rows, _ = get_invoice_page(search=q, limit=1000)
+    return {row.invoice_number for row in rows}
+
+def test_triggers_keep_invoice_index_in_sync(ctx):
+    vendor = Vendors.query.first()
+    invoice = add_invoice("FTS-SYNC-1", vendor, "zanzibar quokka")
+    assert indexed("quokka") == {invoice.id}
+
+    invoice.description = "platypus"
+    db.session.flush()
+    assert indexed("quokka") == set()
+    assert indexed("platypus") == {invoice.id}
+
+    db.session.delete(invoice)
+    db.session.flush()
+    assert indexed("platypus") == set()
+
+def test_invoice_search_mixes_vendor_name_and_invoice_words(ctx):
+    vendor = Vendors.query.filter_by(vendor_name="Global Supplies Inc.").one()
+    add_invoice("QZX-4410", vendor)
+    assert "QZX-4410" in listed("global qzx")
+    assert "QZX-4410" not in listed("techmart qzx")
+
+def test_invoice_search_ignores_vendor_city(ctx):
+    vendor = Vendors.query.filter_by(vendor_name="Global Supplies Inc.").one()
+    vendor.city = "Xylopolis"
+    add_invoice("CITY-1", vendor)
+    assert listed("xylopolis") == set()
+
+@pytest.mark.parametrize("q", ["%", "_", "%_"])
+def test_like_wildcards_in_invoice_search_are_literal(ctx, q):
+    assert listed(q) == set()
+
+def test_invoice_search_finds_a_literal_percent(ctx):
+    vendor = Vendors.query.first()
+    add_invoice("PCT-1", vendor, "discount 15% off")
+    assert listed("%") == {"PCT-1"}
+def test_like_fallback_treats_underscore_literally(ctx, monkeypatch):
+    import search
+    monkeypatch.setattr(search, "fts_available", lambda: False)
+    assert search.search_vendors("_") == []
+    assert search.search_invoices("_") == []
+    assert search.search_vendors("global")[0]["vendor_name"] == "Global Supplies Inc."
\ No newline at end of file
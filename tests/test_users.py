@@ -0,0 +1,14 @@
+import pytest
+
+from database import get_user_directory_page
+
+@pytest.mark.parametrize("q", ["%", "_", "\\"])
+def test_user_directory_search_treats_wildcards_literally(app, q):
+    with app.app_context():
+        users, _ = get_user_directory_page(search=q)
+    assert users == []
+
+def test_user_directory_search_still_matches_substrings(app):
+    with app.app_context():
+        users, _ = get_user_directory_page(search="mit")
+    assert [user.username for user in users] == ["asmith"]
\ No newline at end of file
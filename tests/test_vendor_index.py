@@ -0,0 +1,99 @@
+import threading
+import time
+
+from vendor_index import VendorNameIndex
+
+class GatedIndex(VendorNameIndex):
+    # Counts loads and holds each one until the test opens the gate
+    def __init__(self):
+        super().__init__()
+        self.loads = 0
+        self.gate = threading.Event()
+
+    def _run_load(self, generation):
+        self.loads += 1
+        self.gate.wait(5)
+        super()._run_load(generation)
+
+def run_in_threads(app, count, target):
+    results = [None] * count
+
+    def run(index):
+        with app.app_context():
+            results[index] = target()
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+def test_cold_index_is_loaded_once_by_concurrent_searches(app):
+    index = GatedIndex()
+    threads, results = run_in_threads(app, 8, lambda: index.prefix_search("global"))
+    time.sleep(0.2)
+    index.gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert index.loads == 1
+    assert all(result == results[0] for result in results)
+    assert results[0][0][1] == "Global Supplies Inc."
+
+def test_stale_index_answers_while_it_reloads_in_the_background(app):
+    index = GatedIndex()
+    index.gate.set()
+    with app.app_context():
+        index.load()
+    index.gate.clear()
+    index._loaded_at -= index.max_age + 1
+
+    with app.app_context():
+        assert index.prefix_search("global")
+        assert index.prefix_search("global")
+    assert index._loading
+
+    index.gate.set()
+    deadline = time.monotonic() + 5
+    while index._loading and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert index.loads == 2  # one refresh, however many callers saw the stale index
+    assert time.monotonic() - index._loaded_at < index.max_age
+
+def test_writes_during_a_load_are_kept(app):
+    index = GatedIndex()
+    threads, _ = run_in_threads(app, 1, index.load)
+    time.sleep(0.1)
+    index.upsert(10 ** 9, "Zebra Widgets Ltd")
+    index.gate.set()
+    threads[0].join(5)
+
+    with app.app_context():
+        assert index.prefix_search("zebra") == [(10 ** 9, "Zebra Widgets Ltd")]
+
+def test_invalidate_during_a_load_forces_another(app):
+    index = GatedIndex()
+    threads, _ = run_in_threads(app, 1, index.load)
+    time.sleep(0.1)
+    index.invalidate()
+    index.gate.set()
+    threads[0].join(5)
+
+    assert index._loaded_at is None
+    with app.app_context():
+        index.prefix_search("global")
+    assert index.loads == 2
+
+def test_pdf_vendor_matching_after_a_restart_loads_once(app, monkeypatch):
+    import vendor_index
+    from utilities import match_vendor
+
+    index = GatedIndex()
+    monkeypatch.setattr(vendor_index, "vendor_index", index)
+    threads, results = run_in_threads(app, 8, lambda: match_vendor({"vendor_name": "Global Supplies"}))
+    time.sleep(0.2)
+    index.gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert index.loads == 1
+    assert {result["vendor_name"] for result in results} == {"Global Supplies Inc."}
\ No newline at end of file
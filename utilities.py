@@ -1,9 +1,32 @@
+import re
+from datetime import datetime
+
 def parse_invoice_pdf(pdf_bytes):
+    """
+    Returns (parsed fields with vendor matched, whether the parse came from the cache).
+    """
+    parsed, cached = extract_invoice_fields_cached(pdf_bytes)
+    return match_vendor(parsed), cached
+
+def extract_invoice_fields_cached(pdf_bytes):
+    from cache import parse_cache
+
+    key = parse_cache.key(pdf_bytes)
+    parsed = parse_cache.get(key)
+    if parsed is not None:
+        return parsed, True
+
+    parsed = extract_invoice_fields(pdf_bytes)
+    parse_cache.put(key, parsed)
+    return parsed, False
+
+def extract_invoice_fields(pdf_bytes):
+    """
+    Read invoice fields from the PDF without touching the database,
+    so it can run in a worker process.
+    """
     from PyPDF2 import PdfReader
     import io
-    import re
-    from datetime import datetime
-    from models import Vendors
 
     reader = PdfReader(io.BytesIO(pdf_bytes))
     fields = {}
@@ -17,58 +40,116 @@ def parse_invoice_pdf(pdf_bytes):
                 fields[key.lower()] = str(value).strip()
     else:
         # Fallback: extract visible text if no form fields
-        text = "".join([page.extract_text() or "" for page in reader.pages])
-        fields['invoice_number'] = re.search(r"Invoice\s*Number[:\s]*([A-Za-z0-9-]+)", text, re.IGNORECASE)
-        fields['date'] = re.search(r"Date[:\s\n]*([0-9]{1,2}[-/][0-9]{1,2}[-/][0-9]{2,4})", text, re.IGNORECASE)
-        fields['amount'] = re.search(r"Amount[:\s]*\$?\s*([0-9.,]+)", text, re.IGNORECASE)
-        fields['tax'] = re.search(r"Tax[:\s]*\$?\s*([0-9.,]+)", text, re.IGNORECASE)
-        fields['description'] = re.search(r"Description[:\s]*(.+)", text, re.IGNORECASE)
-        fields['vendor_name'] = re.search(r"Vendor[:\s]*(.+)", text, re.IGNORECASE)
-
-        for key, match in fields.items():
-            fields[key] = match.group(1).strip() if match else None
+        fields = extract_text_fields(reader.pages)
 
     # Normalize and map expected names
-    parsed = {
+    return {
         'invoice_number': fields.get('invoice_number'),
-        'date': fields.get('date'),
-        'amount': fields.get('amount'),
-        'tax': fields.get('tax'),
+        'date': parse_date(fields.get('date')),
+        'amount': parse_amount(fields.get('amount')),
+        'tax': parse_amount(fields.get('tax')),
         'description': fields.get('description'),
         'vendor_name': fields.get('vendor') or fields.get('vendor_name'),
     }
 
-    # Convert date to datetime.date
-    if parsed['date']:
-        for fmt in ("%Y-%m-%d", "%m/%d/%Y"):
-            try:
-                dt = datetime.strptime(parsed['date'], fmt)
-                parsed['date'] = dt.strftime("%m/%d/%Y")  # always return string
-                break
-            except ValueError:
-                continue
-        else:
-            parsed['date'] = None
+# --- Text extraction for PDFs without form fields ---
+MAX_TEXT_PAGES = 20
 
-    # Convert numbers
-    if parsed['amount']:
-        try:
-            parsed['amount'] = float(str(parsed['amount']).replace(",", ""))
-        except ValueError:
-            parsed['amount'] = None
+CURRENCY = r"(?:\$|USD|CAD|EUR|GBP|€|£)?\s*"
+AMOUNT = r"\d{1,3}(?:[,.]\d{3})+(?:[.,]\d{1,2})?|\d+(?:[.,]\d{1,2})?"
+MONTH_NAME = r"[A-Za-z]{3,9}\.?"
+DATE = (r"\d{4}-\d{1,2}-\d{1,2}"
+        r"|\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4}"
+        rf"|\d{{1,2}}\s+{MONTH_NAME},?\s+\d{{4}}"
+        rf"|{MONTH_NAME}\s+\d{{1,2}},?\s+\d{{4}}")
 
-    if parsed['tax']:
+# Every field in one pattern, so each page is scanned once
+FIELD_PATTERN = re.compile(
+    r"Invoice\s*(?:Number|No\.?|\#)[:\s]*(?P<invoice_number>[A-Za-z0-9][A-Za-z0-9/-]*)"
+    rf"|Date[:\s]*(?P<date>{DATE})"
+    rf"|Amount(?:\s*Due)?[:\s]*{CURRENCY}(?P<amount>{AMOUNT})"
+    rf"|Tax[:\s]*{CURRENCY}(?P<tax>{AMOUNT})"
+    r"|Description[:\s]*(?P<description>.+)"
+    r"|Vendor[:\s]*(?P<vendor_name>.+)",
+    re.IGNORECASE,
+)
+TEXT_FIELDS = tuple(FIELD_PATTERN.groupindex)
+
+def extract_text_fields(pages, max_pages=MAX_TEXT_PAGES):
+    """
+    First match of each field, reading pages one at a time and stopping as soon
+    as every field is found or max_pages pages have been read.
+    """
+    fields = dict.fromkeys(TEXT_FIELDS)
+    missing = set(TEXT_FIELDS)
+
+    for page_number, page in enumerate(pages):
+        if page_number >= max_pages or not missing:
+            break
+        text = page.extract_text() or ""
+        for match in FIELD_PATTERN.finditer(text):
+            name = match.lastgroup
+            if name in missing:
+                fields[name] = match.group(name).strip()
+                missing.discard(name)
+                if not missing:
+                    break
+
+    return fields
+
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m-%d-%Y", "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y",
+                "%m/%d/%y", "%d/%m/%y", "%d %B %Y", "%d %b %Y", "%B %d %Y", "%b %d %Y")
+
+def parse_date(value):
+    """
+    Date string in any of DATE_FORMATS as MM/DD/YYYY, or None.
+    Slash and dash dates are read month first, then day first if that fails;
+    dotted dates are day first.
+    """
+    if not value:
+        return None
+    value = " ".join(value.replace(",", " ").replace(". ", " ").split())
+    for fmt in DATE_FORMATS:
         try:
-            parsed['tax'] = float(str(parsed['tax']).replace(",", ""))
+            return datetime.strptime(value, fmt).strftime("%m/%d/%Y")  # always return string
         except ValueError:
-            parsed['tax'] = None
+            continue
+    return None
+
+def parse_amount(value):
+    """
+    Amount string such as '$1,234.50', '1.234,50' or '1234' as a float, or None.
+    """
+    if value is None:
+        return None
+    value = re.sub(r"[^\d.,]", "", str(value))
+    if "," in value and "." in value:
+        # Whichever separator comes last is the decimal point
+        if value.rfind(",") > value.rfind("."):
+            value = value.replace(".", "").replace(",", ".")
+        else:
+            value = value.replace(",", "")
+    elif "," in value:
+        head, _, tail = value.rpartition(",")
+        value = f"{head.replace(',', '')}.{tail}" if len(tail) in (1, 2) else value.replace(",", "")
+    elif value.count(".") > 1:
+        value = value.replace(".", "")
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+def match_vendor(parsed):
+    from vendor_index import vendor_index
 
-    # Match vendor in DB
-    vendor = None
+    # Match vendor against the in-memory vendor name index. A burst of uploads on a
+    # cold index waits for one shared load rather than each scanning Vendors.
+    match = None
     if parsed['vendor_name']:
-        vendor = Vendors.query.filter(Vendors.vendor_name.ilike(f"%{parsed['vendor_name']}%")).first()
+        match = vendor_index.best_match(parsed['vendor_name'])
 
-    parsed['vendor_id'] = vendor.id if vendor else None
-    parsed['vendor_name'] = vendor.vendor_name if vendor else parsed['vendor_name']
+    parsed['vendor_id'] = match[0] if match else None
+    parsed['vendor_name'] = match[1] if match else parsed['vendor_name']
+    parsed['vendor_score'] = match[2] if match else None
 
-    return parsed, None
\ No newline at end of file
+    return parsed
\ No newline at end of file
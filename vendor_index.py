@@ -0,0 +1,292 @@
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from flask import current_app
+from models import db, Vendors
+
+# Legal-form words that do not help tell vendors apart
+NAME_SUFFIXES = {
+    'inc', 'incorporated', 'ltd', 'limited', 'llc', 'llp', 'lp', 'corp', 'corporation',
+    'co', 'company', 'plc', 'gmbh', 'ag', 'sa', 'sarl', 'bv', 'nv', 'pty', 'srl', 'oy', 'ab',
+}
+
+TYPEAHEAD_LIMIT = 10
+MAX_TYPEAHEAD_LIMIT = 50
+
+def folded_tokens(name):
+    # Case, accent and punctuation folded words, in order
+    name = name or ''
+    if not name.isascii():
+        name = unicodedata.normalize('NFKD', name)
+        name = ''.join(ch for ch in name if not unicodedata.combining(ch))
+    name = name.casefold()
+    name = name.replace('&', ' and ')
+    return re.sub(r"[^\w]+|_", " ", name.replace("'", "")).split()
+
+def name_tokens(name, words=None):
+    """
+    Case, accent and punctuation folded tokens of a vendor name,
+    without a leading 'the' or trailing legal suffixes.
+    Pass words when folded_tokens(name) is already known.
+    """
+    tokens = folded_tokens(name) if words is None else words
+
+    if len(tokens) > 1 and tokens[0] == 'the':
+        tokens = tokens[1:]
+    while len(tokens) > 1 and tokens[-1] in NAME_SUFFIXES:
+        tokens = tokens[:-1]
+    return tokens
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class VendorNameIndex:
+    """
+    In-memory index of vendor names for fuzzy matching and typeahead.
+    Loaded from Vendors on first use, updated by vendor_add/vendor_edit, and
+    reloaded in a background thread after max_age seconds to pick up writes
+    from other workers. Only one load runs at a time.
+    """
+    # Attributes replaced as a whole when a load finishes
+    _STATE = ('_names', '_keys', '_tokens', '_exact', '_token_postings', '_gram_postings',
+              '_grams', '_name_prefixes', '_word_prefixes', '_prefix_keys')
+
+    def __init__(self, min_score=0.5, max_age=300):
+        self.min_score = min_score
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._load_done = threading.Condition(self._lock)
+        self._loading = False
+        # Bumped by invalidate(), so a load that started before it does not count as fresh
+        self._generation = 0
+        self._loaded_at = None
+        # (vendor_id, vendor_name or None) written while a load is running
+        self._changes = None
+        self._clear()
+
+    def _clear(self):
+        self._names = {}
+        self._keys = {}
+        self._tokens = {}
+        self._exact = defaultdict(set)
+        self._token_postings = defaultdict(set)
+        self._gram_postings = defaultdict(set)
+        self._grams = {}
+        # Sorted (folded name, id) and (folded name from its second word on, id)
+        # pairs; a prefix is a contiguous run found by bisection
+        self._name_prefixes = []
+        self._word_prefixes = []
+        self._prefix_keys = {}
+
+    def load(self):
+        """
+        Rebuild from Vendors in the calling thread. If a load is already
+        running, wait for it instead of starting another.
+        """
+        with self._lock:
+            if self._loading:
+                while self._loading:
+                    self._load_done.wait()
+                return
+            generation = self._begin_load()
+        self._run_load(generation)
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._loaded_at = None
+
+    def _begin_load(self):
+        # Caller holds the lock and has seen that no load is running
+        self._loading = True
+        self._changes = []
+        return self._generation
+
+    def _run_load(self, generation):
+        # The new index is built without the lock, so searches keep using the old one
+        try:
+            rows = db.session.query(Vendors.id, Vendors.vendor_name).all()
+            staged = VendorNameIndex(self.min_score, self.max_age)
+            for vendor_id, vendor_name in rows:
+                staged._add(vendor_id, vendor_name, sort=False)
+            staged._name_prefixes.sort()
+            staged._word_prefixes.sort()
+
+            with self._lock:
+                # Writes made after the query ran are not in rows
+                for vendor_id, vendor_name in self._changes:
+                    staged._remove(vendor_id)
+                    if vendor_name is not None:
+                        staged._add(vendor_id, vendor_name)
+                for name in self._STATE:
+                    setattr(self, name, getattr(staged, name))
+                if generation == self._generation:
+                    self._loaded_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._loading = False
+                self._changes = None
+                self._load_done.notify_all()
+
+    def _refresh_in_background(self):
+        # Caller holds the lock and has seen that no load is running
+        app = current_app._get_current_object()
+        generation = self._begin_load()
+
+        def refresh():
+            with app.app_context():
+                self._run_load(generation)
+
+        threading.Thread(target=refresh, name="vendor-index-refresh", daemon=True).start()
+
+    def _ensure_loaded(self):
+        # Called without the lock held. A stale index keeps answering while it
+        # is refreshed; before the first load, callers wait for a single loader.
+        with self._lock:
+            while self._loaded_at is None and self._loading:
+                self._load_done.wait()
+            if self._loaded_at is not None:
+                if not self._loading and time.monotonic() - self._loaded_at > self.max_age:
+                    self._refresh_in_background()
+                return
+            generation = self._begin_load()
+        self._run_load(generation)
+
+    def _add(self, vendor_id, vendor_name, sort=True):
+        words = folded_tokens(vendor_name)
+        tokens = name_tokens(vendor_name, words)
+        key = " ".join(tokens)
+        grams = trigrams(key)
+
+        self._names[vendor_id] = vendor_name
+        self._keys[vendor_id] = key
+        self._tokens[vendor_id] = set(tokens)
+        self._grams[vendor_id] = grams
+        self._exact[key].add(vendor_id)
+        token_postings = self._token_postings
+        for token in tokens:
+            token_postings[token].add(vendor_id)
+        gram_postings = self._gram_postings
+        for gram in grams:
+            gram_postings[gram].add(vendor_id)
+
+        prefix_keys = [(" ".join(words[i:]), vendor_id) for i in range(len(words))]
+        self._prefix_keys[vendor_id] = prefix_keys
+        for position, entry in enumerate(prefix_keys):
+            entries = self._name_prefixes if position == 0 else self._word_prefixes
+            if sort:
+                insort(entries, entry)
+            else:
+                entries.append(entry)
+
+    def _remove(self, vendor_id):
+        if vendor_id not in self._names:
+            return
+        self._exact[self._keys[vendor_id]].discard(vendor_id)
+        for token in self._tokens[vendor_id]:
+            self._token_postings[token].discard(vendor_id)
+        for gram in self._grams[vendor_id]:
+            self._gram_postings[gram].discard(vendor_id)
+        for position, entry in enumerate(self._prefix_keys[vendor_id]):
+            entries = self._name_prefixes if position == 0 else self._word_prefixes
+            index = bisect_left(entries, entry)
+            if index < len(entries) and entries[index] == entry:
+                del entries[index]
+        for mapping in (self._names, self._keys, self._tokens, self._grams, self._prefix_keys):
+            del mapping[vendor_id]
+
+    def upsert(self, vendor_id, vendor_name):
+        with self._lock:
+            if self._changes is not None:
+                self._changes.append((vendor_id, vendor_name))
+            if self._loaded_at is None:
+                return  # picked up by the next full load
+            self._remove(vendor_id)
+            self._add(vendor_id, vendor_name)
+
+    def remove(self, vendor_id):
+        with self._lock:
+            if self._changes is not None:
+                self._changes.append((vendor_id, None))
+            self._remove(vendor_id)
+
+    def search(self, name, limit=5):
+        """
+        Ranked [(score, vendor_id, vendor_name)] for the vendors closest to name.
+        Exact matches after folding score 1.0; otherwise token containment and
+        trigram similarity decide the score.
+        """
+        tokens = name_tokens(name)
+        if not tokens:
+            return []
+        key = " ".join(tokens)
+        query_tokens = set(tokens)
+        query_grams = trigrams(key)
+
+        self._ensure_loaded()
+        with self._lock:
+            scores = {vendor_id: 1.0 for vendor_id in self._exact.get(key, ())}
+
+            # Candidates share at least one trigram; only the best few are scored in full
+            overlap = Counter()
+            for gram in query_grams:
+                overlap.update(self._gram_postings.get(gram, ()))
+            for token in query_tokens:
+                overlap.update({vendor_id: 3 for vendor_id in self._token_postings.get(token, ())})
+
+            for vendor_id, _ in overlap.most_common(limit * 20):
+                if vendor_id in scores:
+                    continue
+                grams = self._grams[vendor_id]
+                score = 2 * len(query_grams & grams) / (len(query_grams) + len(grams))
+                vendor_tokens = self._tokens[vendor_id]
+                if query_tokens <= vendor_tokens:
+                    score = max(score, 0.75 + 0.25 * len(query_tokens) / len(vendor_tokens))
+                scores[vendor_id] = min(score, 0.99)
+
+            ranked = sorted(((score, vendor_id, self._names[vendor_id])
+                             for vendor_id, score in scores.items()),
+                            key=lambda item: (-item[0], item[2]))
+        return ranked[:limit]
+
+    def prefix_search(self, prefix, limit=TYPEAHEAD_LIMIT):
+        """
+        [(vendor_id, vendor_name)] of vendors whose folded name starts with the
+        folded prefix, then those with a later word starting with it, each in
+        name order. Cost depends on the limit, not on the number of vendors.
+        """
+        key = " ".join(folded_tokens(prefix))
+        if not key:
+            return []
+        results = []
+        seen = set()
+
+        self._ensure_loaded()
+        with self._lock:
+            for entries in (self._name_prefixes, self._word_prefixes):
+                index = bisect_left(entries, (key,))
+                while index < len(entries) and len(results) < limit:
+                    entry_key, vendor_id = entries[index]
+                    if not entry_key.startswith(key):
+                        break
+                    if vendor_id not in seen:
+                        seen.add(vendor_id)
+                        results.append((vendor_id, self._names[vendor_id]))
+                    index += 1
+        return results
+
+    def best_match(self, name):
+        """
+        (vendor_id, vendor_name, score) of the best match, or None if nothing scores above min_score.
+        """
+        results = self.search(name, limit=1)
+        if results and results[0][0] >= self.min_score:
+            score, vendor_id, vendor_name = results[0]
+            return vendor_id, vendor_name, round(score, 3)
+        return None
+
+vendor_index = VendorNameIndex()
\ No newline at end of file